@@ -0,0 +1,264 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_pipeline.py
+#     time the ConfigParms load and write pipeline on generated
+#     cfg_values and cfg files of several sizes and shapes
+#
+#     python benchmarks/bench_pipeline.py [--keys 1000 10000] [--shapes ...]
+#                                         [--formats ini json toml]
+#                                         [--output results.json]
+#     python benchmarks/bench_pipeline.py --compare old.json new.json
+#
+#  The results are written as json with the python version so runs on
+#  different versions or releases can be compared.
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# ConfigParms imports src.config, a generated module stands in for the
+# application config.py and is refilled for each case
+cfg = types.ModuleType('src.config')
+src_pkg = types.ModuleType('src')
+src_pkg.__path__ = []
+src_pkg.config = cfg
+cfg.cfg_values = {}
+cfg.cfg_comments = {}
+sys.modules['src'] = src_pkg
+sys.modules['src.config'] = cfg
+
+from app_config.configparms import ConfigParms
+
+# shape: (vars per section, type codes cycled over the vars, list length,
+#         comment lines per variable)
+SHAPES = {
+    'small_sections': (5, 'bifsl', 3, 0),
+    'huge_sections': (5000, 'bifsl', 3, 0),
+    'list_heavy': (50, 'l', 20, 0),
+    'comment_heavy': (50, 'bifsl', 3, 2),
+}
+
+# the cfg_flnm extension of each file format, see app_config.backends
+FORMATS = {'ini': 'cfg', 'json': 'json', 'toml': 'toml'}
+
+PHASES = ('first_run', 'cold', 'warm', 'artifact', 'version_bump', 'reload',
+          'set_default_config', 'write_cfg', 'parse')
+
+def default_value(var_type, n, list_len):
+    """ the default value in config.py for a variable of var_type """
+    if var_type == 'b':
+        return n % 2 == 0
+    if var_type == 'i':
+        return n
+    if var_type == 'f':
+        return n / 4
+    if var_type == 'l':
+        return [f"item{n}_{i}" for i in range(list_len)]
+    return f"text value {n}"
+
+def make_cfg(datadir, shape, keys, fmt='ini') -> None:
+    """ fill the cfg module with keys variables in the layout of shape """
+    per_section, type_codes, list_len, comment_lines = SHAPES[shape]
+    cfg.__dict__.clear()
+    cfg.__dict__.update(__name__='src.config', wkdir_path=None, srcdir=datadir, wkdir=datadir, datadir=datadir,
+                        cfg_flnm=f"bench.{FORMATS[fmt]}", cfg_overlays=[], cfg_confd=None, sys_cfg_version='1.0',
+                        sys_comment_prefixes=['#', ';'], config=None, snapshot=None)
+
+    cfg_values = {'SYSTEM': [['sys_cfg_version', 's']]}
+    cfg_comments = {}
+    for n in range(keys):
+        sec = f"SECT{n // per_section}"
+        if sec not in cfg_values:
+            cfg_values[sec] = []
+            if comment_lines:
+                cfg_comments[sec] = [f"section {sec}"] * comment_lines
+        var_name = f"var{n}"
+        var_type = type_codes[n % len(type_codes)]
+        cfg_values[sec].append([var_name, var_type])
+        setattr(cfg, var_name, default_value(var_type, n, list_len))
+        if comment_lines:
+            cfg_comments[var_name] = [f"comment line {i} for {var_name}" for i in range(comment_lines)]
+
+    cfg.cfg_values = cfg_values
+    cfg.cfg_comments = cfg_comments
+
+def remove_files(datadir) -> None:
+    """ remove the cfg file and the files kept next to it """
+    for flnm in os.listdir(datadir):
+        os.remove(os.path.join(datadir, flnm))
+
+def new_cp(**kwargs):
+    """ a ConfigParms for a process start, the plan is compiled again """
+    return ConfigParms(dict(cfg.cfg_values), cfg.cfg_comments, **kwargs)
+
+def timed(func, repeat, setup=None) -> dict:
+    """ run setup then time func, repeat times """
+    times = []
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        func(arg)
+        times.append(time.perf_counter() - start)
+    return {'min': min(times), 'median': statistics.median(times)}
+
+def edit_value(cp, n) -> None:
+    """ change var3 in the cfg file, a string or list, the file stamp changes """
+    config = cp.read_config_file(cp.new_config())
+    sec = next(sec for sec, vars in cfg.cfg_values.items() if any(var[0] == 'var3' for var in vars))
+    var_type = dict(cfg.cfg_values[sec])['var3']
+    config.set(sec, 'var3', cp.value_formatter()(var_type, f"edit{n}" if var_type == 's' else [f"edit{n}"]))
+    cp.write_cfg(config)
+
+def bench_case(datadir, shape, keys, fmt, repeat) -> dict:
+    """ time each phase for one shape, size and file format """
+    make_cfg(datadir, shape, keys, fmt)
+    flnm = os.path.join(datadir, cfg.cfg_flnm)
+    results = {}
+
+    # no cfg file, the default file is written
+    results['first_run'] = timed(lambda cp: cp.run(), repeat,
+                                 setup=lambda: (remove_files(datadir), new_cp())[1])
+
+    # the cfg file exists, parse and set the cfg module
+    results['cold'] = timed(lambda cp: cp.run(), repeat, setup=new_cp)
+
+    # the cache file is current
+    new_cp(cache=True).run()
+    results['warm'] = timed(lambda cp: cp.run(), repeat, setup=lambda: new_cp(cache=True))
+
+    # the artifact compiled by app_config-compile
+    cp = new_cp()
+    cp.run()
+    cp.save_artifact(cfg.config)
+    results['artifact'] = timed(lambda cp: cp.run(), repeat, setup=lambda: new_cp(artifact=True))
+    remove_files(datadir)
+    new_cp().run()
+
+    # a new sys_cfg_version rewrites the cfg file
+    bumps = iter(range(repeat))
+    def bump():
+        cfg.sys_cfg_version = f"1.{next(bumps) + 1}"
+        return new_cp()
+    results['version_bump'] = timed(lambda cp: cp.run(), repeat, setup=bump)
+
+    # one variable changed in the file
+    cp = new_cp()
+    cp.run()
+    edits = iter(range(repeat))
+    results['reload'] = timed(lambda _: cp.reload(), repeat, setup=lambda: edit_value(cp, next(edits)))
+
+    # the steps inside the phases
+    results['set_default_config'] = timed(lambda config: cp.set_default_config(config), repeat,
+                                          setup=cp.new_config)
+    writes = iter(range(repeat))
+    def changed_config():
+        # a changed file is written, an unchanged one is skipped
+        config = cp.new_config()
+        cp.set_default_config(config)
+        config.set('SYSTEM', 'sys_cfg_version', f"write{next(writes)}")
+        return config
+    results['write_cfg'] = timed(lambda config: cp.write_cfg(config), repeat, setup=changed_config)
+    def parse(config):
+        cp.backend().read(cp, config, flnm)
+    results['parse'] = timed(parse, repeat, setup=cp.new_config)
+
+    return {'shape': shape, 'keys': keys, 'format': fmt, 'file_bytes': os.path.getsize(flnm), 'phases': results}
+
+def default_formats() -> list:
+    """ ini and json, and toml if it can be read """
+    from importlib.util import find_spec
+    formats = ['ini', 'json']
+    # the toml backend reads with tomllib or the tomli package
+    if find_spec('tomllib') or find_spec('tomli'):
+        formats.append('toml')
+    return formats
+
+def package_version():
+    """ the installed app_config version, None when run from the source tree """
+    try:
+        from importlib.metadata import version
+        return version('app_config')
+    except Exception:
+        return None
+
+def run(keys_list, shapes, formats, repeat, output) -> dict:
+    """ run every case, print a table and write the json results """
+    report = {'python': platform.python_version(),
+              'implementation': platform.python_implementation(),
+              'platform': platform.platform(),
+              'app_config': package_version(),
+              'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+              'repeat': repeat,
+              'cases': [],
+              }
+
+    print(f"python {report['python']}, best of {repeat}, seconds")
+    print(f"{'shape':<16} {'keys':>8} {'format':>6} " + " ".join(f"{p[:12]:>12}" for p in PHASES))
+    with tempfile.TemporaryDirectory() as tmpdir:
+        datadir = tmpdir + os.sep
+        for shape in shapes:
+            for keys in keys_list:
+                for fmt in formats:
+                    case = bench_case(datadir, shape, keys, fmt, repeat)
+                    report['cases'].append(case)
+                    remove_files(datadir)
+                    print(f"{shape:<16} {keys:>8} {fmt:>6} "
+                          + " ".join(f"{case['phases'][p]['min']:>12.5f}" for p in PHASES))
+
+    if output:
+        with open(output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {output}")
+    return report
+
+def compare(old_flnm, new_flnm) -> None:
+    """ print the new/old ratio of the best times for the cases in both files """
+    with open(old_flnm, 'r') as f:
+        old = json.load(f)
+    with open(new_flnm, 'r') as f:
+        new = json.load(f)
+
+    # results from before the formats were added are ini
+    old_cases = {(c['shape'], c['keys'], c.get('format', 'ini')): c['phases'] for c in old['cases']}
+    print(f"new/old, python {old['python']} -> {new['python']}, above 1.0 is slower")
+    print(f"{'shape':<16} {'keys':>8} {'format':>6} " + " ".join(f"{p[:12]:>12}" for p in PHASES))
+    for case in new['cases']:
+        fmt = case.get('format', 'ini')
+        old_phases = old_cases.get((case['shape'], case['keys'], fmt))
+        if old_phases is None:
+            continue
+        ratios = []
+        for p in PHASES:
+            if p in old_phases and p in case['phases'] and old_phases[p]['min'] > 0:
+                ratios.append(f"{case['phases'][p]['min'] / old_phases[p]['min']:>12.2f}")
+            else:
+                ratios.append(f"{'-':>12}")
+        print(f"{case['shape']:<16} {case['keys']:>8} {fmt:>6} " + " ".join(ratios))
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="time the ConfigParms load and write pipeline")
+    parser.add_argument('--keys', type=int, nargs='+', default=[1000, 10000])
+    parser.add_argument('--shapes', nargs='+', choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument('--formats', nargs='+', choices=list(FORMATS), default=default_formats())
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', default=f"bench_pipeline_{platform.python_version()}.json",
+                        help="json results file, '' to skip")
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help="compare two results files")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+    else:
+        run(args.keys, args.shapes, args.formats, args.repeat, args.output)
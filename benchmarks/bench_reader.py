@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_reader.py
+#     compare ConfigParser.read with the inireader single pass reader
+#     on generated cfg files
+#
+#     python benchmarks/bench_reader.py [--keys 1000 100000 1000000]
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import argparse
+import configparser
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+from app_config.inireader import read_ini
+
+PREFIXES = ['#', ';']
+
+def gen_cfg(flnm, keys, per_section=100) -> None:
+    """ write a cfg file with keys options, a comment before every 10th option """
+    with open(flnm, 'w') as f:
+        for k in range(keys):
+            if k % per_section == 0:
+                f.write(f"[SECT{k // per_section}]\n# section comment\n")
+            if k % 10 == 0:
+                f.write(f"# comment for var{k}\n")
+            f.write(f"var{k} = value {k},{k + 1},{k + 2}\n")
+            if k % per_section == per_section - 1:
+                f.write("\n")
+
+def read_configparser(flnm):
+    """ the default ConfigParms read, parse then remove the comment options """
+    config = configparser.ConfigParser(allow_no_value=True, comment_prefixes=None)
+    config.read(flnm)
+    for s in config.sections():
+        for key in config[s].items():
+            if key[0][:1] in PREFIXES:
+                config.remove_option(s, key[0])
+    return config
+
+def read_fast(flnm):
+    """ the fast_reader ConfigParms read, see ConfigParms.store_sections """
+    config = configparser.ConfigParser(allow_no_value=True, comment_prefixes=None)
+    with open(flnm, 'r') as f:
+        data = read_ini(f, PREFIXES, config.optionxform, flnm)
+    for sec, options in data.items():
+        config.add_section(sec)
+        config._sections[sec].update(options)
+    return config
+
+def timeit(func, flnm, repeat):
+    """ best of repeat runs """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(flnm)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def run(keys_list, repeat):
+    """ run the benchmark for each file size """
+    print(f"{'keys':>10} {'configparser':>14} {'inireader':>14} {'speedup':>8}")
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for keys in keys_list:
+            flnm = os.path.join(tmpdir, f"bench_{keys}.cfg")
+            gen_cfg(flnm, keys)
+
+            # both readers must load the same values
+            expected = read_configparser(flnm)
+            got = read_fast(flnm)
+            assert all(dict(expected[s]) == dict(got[s]) for s in expected.sections())
+
+            cp_time = timeit(read_configparser, flnm, repeat)
+            fast_time = timeit(read_fast, flnm, repeat)
+            print(f"{keys:>10} {cp_time:>13.4f}s {fast_time:>13.4f}s {cp_time / fast_time:>7.1f}x")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="compare ConfigParser.read with inireader.read_ini")
+    parser.add_argument('--keys', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    run(args.keys, args.repeat)
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  artifact.py
+#     the compiled config artifact, the typed values and the config
+#     sections written by app_config-compile and loaded by ConfigParms
+#     in place of the cfg file
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import marshal
+import os
+import struct
+import sys
+
+MAGIC = b'ACFG'
+# incremented when the payload layout changes
+FORMAT_VERSION = 1
+
+# magic, format version, marshal version, python major and minor,
+# payload length, sha256 of the payload
+HEADER = struct.Struct('<4sHHBBI32s')
+
+class ArtifactError(ValueError):
+    """ the artifact cannot be used, it must be compiled again """
+
+def dumps(payload) -> bytes:
+    """ the artifact bytes of payload, a dict marshal can write """
+    import hashlib
+    data = marshal.dumps(payload)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, marshal.version, sys.version_info[0], sys.version_info[1],
+                       len(data), hashlib.sha256(data).digest()) + data
+
+def loads(blob, flnm='<artifact>') -> dict:
+    """ the payload of the artifact bytes, raises ArtifactError if the bytes
+        are not an artifact of this format and python version
+    """
+    import hashlib
+    if len(blob) < HEADER.size:
+        raise ArtifactError(f"{flnm} is not a config artifact")
+    magic, version, marshal_version, major, minor, length, digest = HEADER.unpack_from(blob)
+    if magic != MAGIC:
+        raise ArtifactError(f"{flnm} is not a config artifact")
+    if version != FORMAT_VERSION:
+        raise ArtifactError(f"{flnm} has format version {version}, {FORMAT_VERSION} is supported")
+    if marshal_version != marshal.version or (major, minor) != sys.version_info[:2]:
+        raise ArtifactError(f"{flnm} was compiled with python {major}.{minor}, "
+                            f"this is {sys.version_info[0]}.{sys.version_info[1]}")
+    data = blob[HEADER.size:]
+    if len(data) != length or hashlib.sha256(data).digest() != digest:
+        raise ArtifactError(f"{flnm} is truncated or damaged")
+    return marshal.loads(data)
+
+def write(flnm, payload) -> None:
+    """ write the artifact file, replacing it atomically """
+    tmp_flnm = f"{flnm}.{os.getpid()}.tmp"
+    try:
+        with open(tmp_flnm, 'wb') as f:
+            f.write(dumps(payload))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_flnm, flnm)
+    except BaseException:
+        if os.path.exists(tmp_flnm):
+            os.remove(tmp_flnm)
+        raise
+
+def read(flnm) -> dict:
+    """ the payload of the artifact file """
+    try:
+        with open(flnm, 'rb') as f:
+            blob = f.read()
+    except FileNotFoundError:
+        raise ArtifactError(f"{flnm} not found, compile it with app_config-compile") from None
+    return loads(blob, flnm)
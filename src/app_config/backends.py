@@ -0,0 +1,200 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  backends.py
+#     read and write the cfg file in the format given by the extension
+#     of cfg_flnm: .toml, .json, otherwise ini
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import abc
+import configparser
+import os
+import re
+
+class IniBackend:
+    """ the ini format read and written with ConfigParser, the values are
+        strings converted with the cfg_values type
+    """
+
+    # values in config are the types read, not strings
+    native = False
+
+    def new_config(self, prefixes, interpolation=None):
+        """ the parser the file is read into, comment lines are skipped
+            interpolation replaces the configparser %(name)s interpolation
+        """
+        if interpolation is None:
+            return configparser.ConfigParser(allow_no_value=True, comment_prefixes=prefixes)
+        return configparser.ConfigParser(allow_no_value=True, comment_prefixes=prefixes, interpolation=interpolation)
+
+    def read(self, cp, config, flnm) -> None:
+        """ parse the file flnm into config """
+        with open(flnm, 'r') as f:
+            cp.read_lines(config, f, flnm)
+
+    def render(self, cp, config) -> str:
+        """ the text of the file """
+        return cp.render_cfg(config)
+
+    def format_value(self, var_type, value):
+        """ the value set in config for a cfg module value """
+        from app_config.configparms import format_value
+        return format_value(var_type, value)
+
+class NativeBackend(IniBackend, abc.ABC):
+    """ a format with typed values, they are kept as read in a RawConfigParser
+        and set in the cfg module without a string conversion
+        a subclass defines loads and render
+    """
+
+    native = True
+
+    def new_config(self, prefixes, interpolation=None):
+        """ a parser without interpolation so the values are not strings,
+            interpolation only expands the string values
+        """
+        return configparser.RawConfigParser(allow_no_value=True, comment_prefixes=prefixes, interpolation=interpolation)
+
+    def read(self, cp, config, flnm) -> None:
+        """ parse the file into {section: {option: value}} and store it """
+        with open(flnm, 'r', encoding='utf-8') as f:
+            data = self.loads(f.read(), flnm)
+
+        optionxform = config.optionxform
+        sections = {}
+        for sec, options in data.items():
+            if not isinstance(options, dict):
+                raise configparser.ParsingError(f"{flnm}: {sec} is not a section")
+            sections[sec] = {optionxform(k): v for k, v in options.items()}
+        cp.store_sections(config, sections)
+
+    @abc.abstractmethod
+    def loads(self, text, flnm) -> dict:
+        """ the {section: {option: value}} of the text of the file flnm,
+            raises configparser.ParsingError if it is not valid
+        """
+
+    def format_value(self, var_type, value):
+        """ lists, sets and arrays are written as lists """
+        if hasattr(value, 'tolist'):
+            return value.tolist()
+        if isinstance(value, (set, frozenset)):
+            try:
+                return sorted(value)
+            except TypeError:
+                return list(value)
+        if isinstance(value, tuple):
+            return list(value)
+        return value
+
+    @staticmethod
+    def sections(config) -> dict:
+        """ {section: {option: value}} of config, the DEFAULT section first
+            and its options not repeated in the other sections
+        """
+        from app_config.configparms import section_items
+        sections = {config.default_section: dict(config.defaults())} if config.defaults() else {}
+        sections.update((sec, section_items(config, sec)) for sec in config.sections())
+        return sections
+
+class JsonBackend(NativeBackend):
+    """ a json object of sections, json has no comments so cfg_comments
+        are not written
+    """
+
+    def loads(self, text, flnm) -> dict:
+        import json
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise configparser.ParsingError(f"{flnm}: the file is not a json object of sections")
+        return data
+
+    def render(self, cp, config) -> str:
+        import json
+        return json.dumps(self.sections(config), indent=2, ensure_ascii=False) + "\n"
+
+# toml keys that are written without quotes
+_BARE_KEY = re.compile(r'[A-Za-z0-9_-]+')
+
+class TomlBackend(NativeBackend):
+    """ toml read with tomllib, python 3.11+ or the tomli package, and
+        written by a minimal writer: a table per section with the
+        cfg_comments, values None are not written
+    """
+
+    def loads(self, text, flnm) -> dict:
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError("reading a toml cfg file needs python 3.11 or the tomli package") from None
+        try:
+            return tomllib.loads(text)
+        except tomllib.TOMLDecodeError as e:
+            raise configparser.ParsingError(f"{flnm}: {e}") from None
+
+    def render(self, cp, config) -> str:
+        var_comments = cp.var_comments(config)
+        lines = []
+        for sec, options in self.sections(config).items():
+            lines.append(f"[{toml_key(sec)}]\n")
+            if sec in cp.cfg_values:
+                for c in cp.cfg_comments.get(sec, ()):
+                    lines.append(f"# {c}\n")
+            for key, value in options.items():
+                if value is None:
+                    continue
+                for c in var_comments.get((sec, key), ()):
+                    lines.append(f"# {c}\n")
+                lines.append(f"{toml_key(key)} = {toml_value(value)}\n")
+            lines.append("\n")
+        return "".join(lines)
+
+def toml_key(key) -> str:
+    """ a bare or quoted key """
+    if _BARE_KEY.fullmatch(key):
+        return key
+    return toml_string(key)
+
+def toml_string(value) -> str:
+    """ a basic string, the json escapes are valid toml escapes """
+    import json
+    return json.dumps(value, ensure_ascii=False)
+
+def toml_value(value) -> str:
+    """ the toml text of a value """
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        if value != value:
+            return 'nan'
+        if value in (float('inf'), float('-inf')):
+            return 'inf' if value > 0 else '-inf'
+        return repr(value)
+    if isinstance(value, str):
+        return toml_string(value)
+    if isinstance(value, dict):
+        items = ", ".join(f"{toml_key(str(k))} = {toml_value(v)}" for k, v in value.items())
+        return f"{{ {items} }}" if items else "{}"
+    if isinstance(value, (list, tuple, set, frozenset)) or hasattr(value, 'tolist'):
+        if hasattr(value, 'tolist'):
+            value = value.tolist()
+        return "[" + ", ".join(toml_value(v) for v in value) + "]"
+    raise TypeError(f"cannot write {type(value).__name__} value {value!r} to toml")
+
+# the backend for each cfg_flnm extension, others are ini
+backends = {'.toml': TomlBackend(),
+            '.json': JsonBackend(),
+            }
+ini_backend = IniBackend()
+
+def backend_for(flnm):
+    """ the backend for the extension of flnm """
+    return backends.get(os.path.splitext(flnm)[1].lower(), ini_backend)
@@ -0,0 +1,268 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  check_config.py
+#     run as app_config-check in the application directory to validate,
+#     and with --upgrade rewrite, many cfg files built from the config.py
+#     schema, the files are checked in parallel worker processes
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import argparse
+import configparser
+import fnmatch
+import os
+import sys
+import time
+
+# set in each worker process by init_worker
+_cp = None
+_validator = None
+
+def find_files(paths, pattern) -> list:
+    """ the files matching pattern in the directory trees of paths, a path
+        that is a file is always included
+    """
+    flnms = []
+    for path in paths:
+        if os.path.isfile(path):
+            flnms.append(path)
+            continue
+        for dirpath, dirnames, filenames in os.walk(path):
+            dirnames.sort()
+            flnms.extend(os.path.join(dirpath, f) for f in sorted(filenames) if fnmatch.fnmatch(f, pattern))
+    return flnms
+
+def init_worker(app_dir) -> None:
+    """ import the src.config module of the application, its ConfigParms and
+        cfg module values are the schema and defaults, they are only read
+    """
+    global _cp, _validator
+    app_dir = os.path.abspath(app_dir)
+    if app_dir not in sys.path:
+        sys.path.insert(0, app_dir)
+    import src.config as cfg
+    from app_config.validation import compile_validator
+
+    _cp = cfg.cp
+    constraints = getattr(cfg, 'cfg_constraints', None)
+    _validator = compile_validator(constraints, _cp.cfg_values) if constraints else None
+
+def check_file(flnm, upgrade=False) -> dict:
+    """ read flnm, convert its values with the cfg_values types and check them
+        against cfg_constraints, cfg.config is not changed and the cfg module
+        only by the ConfigParmsExt hooks
+        if upgrade, a file with an old sys_cfg_version, missing or unknown
+        options is rewritten in the current format, a file with errors is not
+        returns {'file', 'status', 'errors', 'changes', 'seconds'}, status is
+        ok, upgrade (needs an upgrade), upgraded or error
+    """
+    from app_config.backends import backend_for
+
+    start = time.perf_counter()
+    result = {'file': flnm, 'status': 'ok', 'errors': [], 'changes': [], 'seconds': 0.0}
+    try:
+        config, values = read_values(flnm, result['errors'])
+        if _validator is not None:
+            from collections import ChainMap
+            import src.config as cfg
+            result['errors'].extend(_validator(ChainMap(values, cfg.__dict__)))
+
+        result['changes'] = upgrade_changes(config, backend_for(flnm))
+        if result['errors']:
+            result['status'] = 'error'
+        elif result['changes']:
+            result['status'] = 'upgrade'
+            if upgrade:
+                write_upgrade(flnm, config)
+                result['status'] = 'upgraded'
+    except Exception as e:
+        result['status'] = 'error'
+        result['errors'].append(f"{type(e).__name__}: {e}")
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+def read_values(flnm, errors) -> tuple:
+    """ the config read from flnm and {var: typed value} of the options in it,
+        each value that cannot be converted is added to errors
+        the sections and variables a set_module_sects or set_module_vars hook
+        handles are not converted
+    """
+    from app_config.backends import backend_for
+    from app_config.configparms import _MISSING, convert_value
+
+    backend = backend_for(flnm)
+    config = backend.new_config(_cp.prefixes)
+    backend.read(_cp, config, flnm)
+
+    values = {}
+    for sec, vars, converters in _cp.plan():
+        if not config.has_section(sec):
+            continue
+        if _cp.set_module_sects(config, sec, vars):
+            continue
+        try:
+            items = dict(config.items(sec))
+        except configparser.Error as e:
+            errors.append(f"{sec}: {e}")
+            continue
+        for var_name, var_type, convert in converters:
+            if _cp.set_module_vars(config, sec, vars, var_name):
+                continue
+            value = items.get(config.optionxform(var_name), _MISSING)
+            if value is _MISSING or convert is _MISSING:
+                continue
+            try:
+                value = convert_value(value, var_type, convert)
+            except (ValueError, TypeError) as e:
+                errors.append(f"{sec}.{var_name}: {e}")
+                continue
+            values[var_name] = value
+    return config, values
+
+def upgrade_changes(config, backend) -> list:
+    """ what an upgrade changes in config: the sys_cfg_version, and the
+        options added, removed or changed, config is not changed
+    """
+    import src.config as cfg
+    from app_config.configparms import section_items
+
+    upgraded = copy_config(config, backend)
+    upgrade_config(upgraded, backend)
+    changes = []
+    version = config.get('SYSTEM', 'sys_cfg_version', raw=True, fallback=None)
+    if version != cfg.sys_cfg_version:
+        changes.append(f"sys_cfg_version {version} -> {cfg.sys_cfg_version}")
+    for sec in upgraded.sections():
+        old = section_items(config, sec) if config.has_section(sec) else {}
+        new = section_items(upgraded, sec)
+        changes.extend(f"{sec}.{name} added" for name in sorted(new.keys() - old.keys()))
+        changes.extend(f"{sec}.{name} removed" for name in sorted(old.keys() - new.keys()))
+        changes.extend(f"{sec}.{name} changed" for name in sorted(old.keys() & new.keys())
+                       if old[name] != new[name] and (sec, name) != ('SYSTEM', 'sys_cfg_version'))
+    return changes
+
+def copy_config(config, backend):
+    """ a copy of config with the values as read """
+    from app_config.configparms import section_items
+
+    copy = backend.new_config(_cp.prefixes)
+    copy.optionxform = config.optionxform
+    _cp.store_sections(copy, {copy.default_section: dict(config.defaults()),
+                              **{sec: section_items(config, sec) for sec in config.sections()}})
+    return copy
+
+def upgrade_config(config, backend) -> None:
+    """ set the cfg_values options of config in order as a version rewrite
+        does, the values in the file are kept, the missing options get the
+        cfg module defaults and the options not in cfg_values are removed
+        a section or variable the default or verify hooks of ConfigParmsExt
+        handle is left to the hook, the options of the file are kept in it
+    """
+    import src.config as cfg
+    from app_config.configparms import section_items
+
+    formatter = backend.format_value
+    for sec, vars in _cp.cfg_values.items():
+        old = section_items(config, sec) if config.has_section(sec) else {}
+        if not config.has_section(sec):
+            config.add_section(sec)
+        config[sec].clear()
+        if _cp.set_custom_default_sects(config, sec, vars):
+            for option, value in old.items():
+                config.set(sec, option, value)
+            continue
+        for var in vars:
+            option = config.optionxform(var[0])
+            if _cp.set_custom_default_vars(config, sec, vars, var[0]):
+                if option in old:
+                    config.set(sec, option, old[option])
+                continue
+            value = old[option] if option in old else formatter(var[1], getattr(cfg, var[0]))
+            config.set(sec, option, value)
+
+    # the verify hooks run as on a load, the options are already set
+    _cp.verify_config_attributes(config)
+    if config.has_section('SYSTEM'):
+        config.set('SYSTEM', 'sys_cfg_version', formatter('s', cfg.sys_cfg_version))
+
+def write_upgrade(flnm, config) -> None:
+    """ rewrite flnm with config upgraded, see upgrade_config """
+    from app_config.backends import backend_for
+
+    backend = backend_for(flnm)
+    upgrade_config(config, backend)
+    _cp.write_text(flnm, backend.render(_cp, config))
+
+def check_files(flnms, upgrade=False, jobs=None, app_dir='.'):
+    """ yield the check_file result of each file, in order, the files are
+        checked by jobs worker processes, in this process if jobs is 1
+    """
+    if jobs == 1 or len(flnms) < 2:
+        init_worker(app_dir)
+        for flnm in flnms:
+            yield check_file(flnm, upgrade)
+        return
+
+    from concurrent.futures import ProcessPoolExecutor
+    from functools import partial
+
+    jobs = jobs or os.cpu_count() or 1
+    # several files per task so the pool overhead is small for small files
+    chunksize = max(1, min(64, len(flnms) // (jobs * 4)))
+    with ProcessPoolExecutor(jobs, initializer=init_worker, initargs=(app_dir,)) as pool:
+        yield from pool.map(partial(check_file, upgrade=upgrade), flnms, chunksize=chunksize)
+
+def run():
+    """ the app_config-check command """
+    parser = argparse.ArgumentParser(prog='app_config-check',
+                                     description="validate cfg files against the config.py of the application")
+    parser.add_argument('paths', nargs='+', help="cfg files and directories searched for cfg files")
+    parser.add_argument('-p', '--pattern', help="the file names searched for, default *<extension of cfg_flnm>")
+    parser.add_argument('-u', '--upgrade', action='store_true',
+                        help="rewrite the files with an old sys_cfg_version, missing or unknown options")
+    parser.add_argument('-j', '--jobs', type=int, help="worker processes, default the number of cpus")
+    parser.add_argument('-d', '--dir', default=os.getcwd(),
+                        help="the application directory holding src/config.py, default the current directory")
+    parser.add_argument('-q', '--quiet', action='store_true', help="list only the files that are not ok")
+    parser.add_argument('--json', metavar='FILE', help="also write the results to FILE as json")
+    args = parser.parse_args()
+
+    pattern = args.pattern
+    if pattern is None:
+        init_worker(args.dir)
+        import src.config as cfg
+        pattern = f"*{os.path.splitext(cfg.cfg_flnm)[1] or '.cfg'}"
+
+    start = time.perf_counter()
+    flnms = find_files(args.paths, pattern)
+    results = []
+    counts = {}
+    for result in check_files(flnms, args.upgrade, args.jobs, args.dir):
+        results.append(result)
+        counts[result['status']] = counts.get(result['status'], 0) + 1
+        if args.quiet and result['status'] == 'ok':
+            continue
+        print(f"{result['status']:<9} {result['seconds'] * 1000:>9.2f} ms  {result['file']}")
+        for error in result['errors']:
+            print(f"          {error}")
+        if not args.quiet:
+            for change in result['changes']:
+                print(f"          {change}")
+    elapsed = time.perf_counter() - start
+
+    summary = ", ".join(f"{n} {status}" for status, n in sorted(counts.items()))
+    print(f"{len(results)} files in {elapsed:.2f}s ({sum(r['seconds'] for r in results):.2f}s checking)"
+          f"{': ' + summary if summary else ''}")
+
+    if args.json:
+        import json
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    sys.exit(1 if counts.get('error') else 0)
+
+if __name__ == '__main__':
+    run()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  compile_config.py
+#     run as app_config-compile in the application directory to read the
+#     cfg file once and write the artifact ConfigParms loads in place of
+#     the cfg file, see README.md Compiled artifact
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import argparse
+import os
+import sys
+
+def compile_config(cfg_flnm=None, output=None) -> str:
+    """ run the ConfigParms of the imported src.config module and write the
+        artifact, cfg_flnm replaces the cfg file in the data directory
+        returns the artifact path
+    """
+    import src.config as cfg
+
+    cp = cfg.cp
+    if cfg_flnm is not None:
+        cfg.datadir = os.path.join(os.path.dirname(os.path.abspath(cfg_flnm)), '')
+        cfg.cfg_flnm = os.path.basename(cfg_flnm)
+    output = output or cp.artifact_flnm()
+
+    # the cfg file is read, not a previous artifact
+    cp.artifact = None
+    cp.run()
+    return cp.save_artifact(cfg.config, output)
+
+def run():
+    """ the app_config-compile command """
+    parser = argparse.ArgumentParser(prog='app_config-compile',
+                                     description="compile the cfg file into the artifact loaded by ConfigParms")
+    parser.add_argument('cfg', nargs='?', help="the cfg file, default cfg_flnm in the data directory")
+    parser.add_argument('-o', '--output', help="the artifact path, default the cfg file path with .bin added")
+    parser.add_argument('-d', '--dir', default=os.getcwd(),
+                        help="the application directory holding src/config.py, default the current directory")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.dir))
+    cfg_flnm = os.path.abspath(args.cfg) if args.cfg else None
+    output = os.path.abspath(args.output) if args.output else None
+    os.chdir(args.dir)
+
+    flnm = compile_config(cfg_flnm, output)
+    print(f"    {flnm} compiled, {os.path.getsize(flnm)} bytes")
+
+if __name__ == '__main__':
+    run()
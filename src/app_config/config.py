@@ -22,6 +22,14 @@ wkdir = None
 srcdir = None
 datadir = None
 
+# layered files read after cfg_flnm, their values override the cfg file
+#   cfg_overlays - file names in the data directory, applied in order
+#                  ie an environment overlay ['prod.cfg']
+#   cfg_confd - a directory in the data directory, every *.cfg in it is
+#               applied in name order after the overlays, ie 'conf.d'
+cfg_overlays = []
+cfg_confd = None
+
 # section variables
 # MAIN
 var1 = True
@@ -40,12 +48,24 @@ sys_var = "sysvar test variable"
 # values passed to ConfigParms
 # dict key is the section, value is list of variable names and type
 #   types are i-integer, f-float, b-boolean, s-string, l-list
+#         ai-integer array, af-float array (numpy arrays if numpy is installed,
+#         otherwise array.array)
+#         fs-frozenset, written one item per line
 
 cfg_values = {'MAIN': [('var1', 'b'), ('var2', 'i'), ('var3', 'f')],
               'DATA': [('m1', 's'), ('m2', 'l')],
               'SYSTEM': [('sys_cfg_version', 's'), ('sys_comment_prefixes', 'l'), ('sys_var', 's')],
               }
 
+# constraints checked after the values are converted, all the errors are
+# raised together in a ConfigValidationError
+#   {var_name: {'min': 0, 'max': 10}}            the value or each list item
+#   {var_name: {'choices': ['a', 'b']}}
+#   {var_name: {'regex': r'[a-z]+'}}
+#   {(var_name, var_name2): {'check': lambda v1, v2: v1 < v2,
+#                            'message': 'var_name must be less than var_name2'}}
+cfg_constraints = {}
+
 # comments
 cfg_comments = {'sys_cfg_version': ['changing the version number will cause file to be rewritten'],
                 'sys_var': ['sys var cmt1', 'remove me'],
@@ -57,6 +77,20 @@ cfg_comments = {'sys_cfg_version': ['changing the version number will cause file
 # config obj built by config parse
 config = None
 
+# ConfigSnapshot of the cfg_values variables, replaced on each run or reload
+# keep a reference to read related values consistently, ie
+#     snap = cfg.snapshot
+#     connect(snap.host, snap.port)
+snapshot = None
+
+# lazy loading, set True to set each section in this module on first access
+# the cfg file is read on a background thread when this module is imported
+lazy_load = False
+
+# the artifact compiled by app_config-compile is loaded in place of the cfg
+# file, True for the cfg file path with .bin added or the artifact path
+cfg_artifact = None
+
 # variables passed to all modules
 gen_var1 = []
 
@@ -78,6 +112,9 @@ to control the run in your application, just instantiate the class in this modul
 
 and then in the application code, read the parm file:
     cfg.run()
+
+to load each section on first access, set lazy_load = True above.  The cfg
+file is read on a background thread at import and cfg.run() is not needed.
 """
 
 # the imports must be at end of the config module
@@ -102,12 +139,30 @@ def run_init():
         from app_config.configparms_ext import ConfigParmsExt as ConfigParms
 
     from app_config.configutils import ConfigUtils
-    cp = ConfigParms(cfg_values, cfg_comments, autorun=False)
+    cp = ConfigParms(cfg_values, cfg_comments, autorun=False, artifact=cfg_artifact)
     cu = ConfigUtils()
 
+    if lazy_load:
+        cp.run_lazy(prefetch=True)
+
 def run():
     """read the config file & set values in module"""
-    cp.run()
+    if lazy_load:
+        cp.run_lazy(prefetch=True)
+    else:
+        cp.run()
+
+async def arun():
+    """read the config file & set values in module from an asyncio
+        application, the file io does not block the event loop
+    """
+    await cp.arun()
+
+def __getattr__(name):
+    """ with lazy_load, a variable not yet set is loaded on first access """
+    if lazy_load and 'cp' in globals():
+        return cp.lazy_value(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # instantiate the configparms module
 run_init()
\ No newline at end of file
@@ -9,12 +9,242 @@
 #  Licensed under the Apache License, Version 2.0
 #  http://www.apache.org/licenses/LICENSE-2.0
 
+# keep the imports at the top light, src.config is imported by every
+# application module, see README.md Import time.  Modules needed only by
+# some options are imported in the method that uses them
 import configparser
-from pathlib import Path
+import io
 import os
 import sys
-import importlib.util
+import re
+# the lock and thread id only, threading is imported by watch, lazy_load and update
+from _thread import RLock, get_ident
 import src.config as cfg
+from app_config.backends import backend_for
+
+# marks a variable missing from the config object
+_MISSING = object()
+
+# section headers in a mapped cfg file, the file is read with the locale encoding
+_SECTION_RE = re.compile(rb'^\[(.+)\][ \t]*\r?$', re.MULTILINE)
+
+# resolved paths of the config module, see resolve_directories
+_directories = {}
+
+def _to_bool(value, states=configparser.ConfigParser.BOOLEAN_STATES):
+    """ convert a config string to bool, same values as ConfigParser.getboolean """
+    try:
+        return states[value.lower()]
+    except KeyError:
+        raise ValueError(f"Not a boolean: {value}") from None
+
+# an item of a list written on one line with commas or one item per line
+_LIST_ITEM_RE = re.compile(r'[^,\n]+')
+
+def _iter_items(value):
+    """ the items of a multi line list value, blank items are skipped """
+    for m in _LIST_ITEM_RE.finditer(value):
+        item = m.group().strip()
+        if item:
+            yield item
+
+def _to_list(value):
+    """ convert a comma separated config string to a list
+        a value on several lines may have one or more items on each line
+    """
+    if '\n' in value:
+        return list(_iter_items(value))
+    return [x.strip() for x in value.split(',')]
+
+def _to_frozenset(value):
+    """ convert a list value, or a collection from the cfg module, to a
+        frozenset of interned items for fast membership tests
+    """
+    intern = sys.intern
+    if isinstance(value, str):
+        return frozenset(intern(item) for item in _iter_items(value))
+    return frozenset(intern(item) if type(item) is str else item for item in value)
+
+# numpy is optional, it is imported on the first array conversion
+_np = _MISSING
+
+def _numpy():
+    """ the numpy module, None if it is not installed """
+    global _np
+    if _np is _MISSING:
+        try:
+            import numpy
+            _np = numpy
+        except ImportError:
+            _np = None
+    return _np
+
+def _to_array(value, typecode, dtype, item_type):
+    """ convert a comma separated config string, or a sequence of numbers
+        from the cfg module, to a numpy array if numpy is installed
+        otherwise to an array.array
+    """
+    np = _numpy()
+    if not isinstance(value, str):
+        if np is not None:
+            return np.array(value, dtype=dtype)
+        from array import array
+        return array(typecode, value)
+
+    if np is not None:
+        # parsed in C, whitespace and new lines around the items are skipped
+        result = np.fromstring(value, dtype=dtype, sep=',')
+        # fromstring stops at the first item it cannot parse
+        if len(result) != (value.count(',') + 1 if value.strip() else 0):
+            raise ValueError(f"invalid {dtype} array: {value}")
+        return result
+
+    from array import array
+    if not value.strip():
+        return array(typecode)
+    return array(typecode, map(item_type, value.split(',')))
+
+def _to_int_array(value):
+    """ convert to an int64 array """
+    return _to_array(value, 'q', 'int64', int)
+
+def _to_float_array(value):
+    """ convert to a float64 array """
+    return _to_array(value, 'd', 'float64', float)
+
+# converter for each cfg_values type, None leaves the string as is
+converters = {'b': _to_bool,
+              'f': float,
+              'i': int,
+              'l': _to_list,
+              's': None,
+              'ai': _to_int_array,
+              'af': _to_float_array,
+              'fs': _to_frozenset,
+              }
+
+# types whose cfg module default is converted when the variable is not in config
+_convert_defaults = {'ai', 'af', 'fs'}
+# types converted when the value read is not a string, ie from a json or toml file
+_convert_native = _convert_defaults | {'f'}
+
+# the types a value read from a json or toml file may have for each cfg_values
+# type, and the types of the items of a list, bool is only a 'b' value
+_native_types = {'b': (bool,), 'i': (int,), 'f': (int, float), 's': (str,),
+                 'l': (list,), 'ai': (list,), 'af': (list,), 'fs': (list,)}
+_native_items = {'l': (str,), 'ai': (int,), 'af': (int, float)}
+_native_names = {'b': 'a bool', 'i': 'an int', 'f': 'a float', 's': 'a str',
+                 'l': 'a list of str', 'ai': 'a list of int', 'af': 'a list of numbers', 'fs': 'a list'}
+
+def _is_native(value, types) -> bool:
+    """ True if value is one of types, True and False are not numbers """
+    return isinstance(value, types) and (bool in types or not isinstance(value, bool))
+
+def convert_value(value, var_type, convert):
+    """ the cfg module value of a value read from config, a str is converted
+        with convert, a typed value from a json or toml file must be of the
+        cfg_values type, otherwise ValueError is raised
+    """
+    if value is not None and not isinstance(value, str):
+        types = _native_types.get(var_type)
+        items = _native_items.get(var_type)
+        if types is not None and not (_is_native(value, types)
+                                      and (items is None or all(_is_native(i, items) for i in value))):
+            raise ValueError(f"{value!r} is not {_native_names[var_type]}")
+    if convert is not None and (isinstance(value, str) or var_type in _convert_native):
+        value = convert(value)
+    return value
+
+def _format_list(value):
+    """ join a list of str """
+    return ",".join(x for x in value)
+
+def _format_array(value):
+    """ join the numbers of an array or a sequence """
+    if hasattr(value, 'tolist'):
+        value = value.tolist()
+    return ",".join(map(str, value))
+
+def _format_set(value):
+    """ one item per line, sorted so an unchanged set writes the same file """
+    return "\n".join(sorted(map(str, value)))
+
+# formatter for the types not written with str()
+formatters = {'l': _format_list,
+              'ai': _format_array,
+              'af': _format_array,
+              'fs': _format_set,
+              }
+
+def option_text(key, value) -> str:
+    """ the cfg file line of an option, the lines of a multi line value are indented """
+    if value is None:
+        return f"{key}\n"
+    value = str(value).replace('\n', '\n\t')
+    return f"{key} = {value}\n"
+
+def section_items(config, sec) -> dict:
+    """ the raw options set in the section of config, without the options
+        only inherited from the DEFAULT section
+    """
+    store = getattr(config, '_sections', None)
+    if store is not None and sec in store:
+        return dict(store[sec])
+    defaults = config.defaults()
+    return {k: v for k, v in config.items(sec, raw=True) if k not in defaults or v != defaults[k]}
+
+def same_value(old, new) -> bool:
+    """ True if old and new are equal, arrays are compared by their items """
+    if old is new:
+        return True
+    if hasattr(old, 'tolist') or hasattr(new, 'tolist'):
+        return type(old) is type(new) and old.tolist() == new.tolist()
+    try:
+        return bool(old == new)
+    except Exception:
+        return False
+
+def format_value(var_type, value) -> str:
+    """ convert a cfg module value to the string set in config for var_type """
+    formatter = formatters.get(var_type)
+    if formatter is None:
+        return str(value)
+    return formatter(value)
+
+def compile_plan(cfg_values) -> list:
+    """ compile cfg_values into the list of converters used to set the cfg module
+        each entry is (sec, vars, [(var_name, var_type, converter), ...])
+        the converter is _MISSING for an unknown type
+        ConfigParms.plan keeps the plan of its cfg_values
+    """
+    plan = []
+    for sec, vars in cfg_values.items():
+        # do not override the module version number
+        plan.append((sec, vars, [(var[0], var[1], converters.get(var[1], _MISSING))
+                                 for var in vars if var[0] != 'sys_cfg_version']))
+    return plan
+
+def resolve_directories(origin) -> tuple:
+    """ return (wkdir_path, srcdir, wkdir, datadir) for the config module file origin
+        wkdir_path is a pathlib.Path, the directories are str ending in os.sep
+        the path is resolved, symlinks included, once for each process.  If
+        APP_CONFIG_DATADIR is set it is the datadir
+    """
+    from pathlib import Path
+
+    datadir = os.environ.get('APP_CONFIG_DATADIR')
+    wkdir_path = _directories.get(origin)
+    if wkdir_path is None:
+        wkdir_path = os.path.realpath(origin)
+        _directories[origin] = wkdir_path
+
+    srcdir = os.path.dirname(wkdir_path)
+    wkdir = os.path.dirname(srcdir)
+    if datadir:
+        datadir = os.path.join(datadir, '')
+    else:
+        datadir = os.path.join(wkdir, 'data', '')
+    return Path(wkdir_path), srcdir + os.sep, wkdir + os.sep, datadir
 
 class ConfigParms:
     """ read the config file and set cfg values
@@ -22,10 +252,79 @@ class ConfigParms:
            The data values in the cfg file are perserved
     """
 
-    def __init__(self, cfg_values=cfg.cfg_values, cfg_comments=cfg.cfg_comments, autorun=False):
-        """ on init, load the directory paths, if autorun read the cfg file"""
+    # the methods a subclass overrides to customize the processing,
+    # see doc/customizing.md
+    hooks = ('set_directories', 'custom_init_routine',
+             'set_custom_default_sects', 'set_custom_default_vars',
+             'verify_config_sects', 'verify_config_vars',
+             'set_module_sects', 'set_module_vars', 'set_custom_module_vars')
+
+    def __init__(self, cfg_values=cfg.cfg_values, cfg_comments=cfg.cfg_comments, autorun=False, cache=False,
+                 fast_reader=False, partial_load=False, stats=False, tracer=None, sections=False, artifact=None,
+                 interpolation=False, write_delay=1.0):
+        """ on init, load the directory paths, if autorun read the cfg file
+            if cache, the parsed values are saved in the data directory and
+            reused on the next run while the cfg file is unchanged
+            if fast_reader, the cfg file is read with inireader instead of
+            ConfigParser.read
+            if partial_load, only the sections in cfg_values are read from the
+            mapped cfg file using a section index kept next to it
+            if stats or tracer, the time of each phase and hook is kept in
+            self.stats and tracer(name, start, end, ok) is called as each
+            phase ends
+            if sections, each cfg_values section is also set in the cfg module
+            as an object with a slot per variable, ie cfg.MAIN.var1
+            if artifact, the values are loaded from the artifact compiled by
+            app_config-compile instead of the cfg file, True for the default
+            path next to the cfg file or the path of the artifact
+            if interpolation, ${key} and ${SECTION:key} references in the values
+            are resolved once per load, see app_config.interpolation
+            write_delay is the seconds update waits to write the cfg file, the
+            updates made meanwhile are written together, 0 writes at once
+        """
         self.cfg_values = cfg_values
         self.cfg_comments = cfg_comments
+        self.cache = cache
+        self.fast_reader = fast_reader
+        self.partial_load = partial_load
+        self.sections = sections
+        self.artifact = artifact
+        self.interpolation = interpolation
+        # set when read_partial did not read the whole file
+        self.partial_loaded = False
+
+        # layered files, parsed files are kept by path with their file stamp
+        self.layer_cache = {}
+        # values merged from the layers and the base values they replaced
+        self.layer_values = {}
+        self.layer_base = {}
+
+        # typed values set in the cfg module by the last run {sec: {var: value}}
+        self.typed_values = {}
+        # values converted by set_section_variables, set in the cfg module by publish
+        self.staged = {}
+        # one thread at a time converts and publishes values
+        self.load_lock = RLock()
+        # typed values loaded from the cache, None when the cfg file was parsed
+        self.cached_values = None
+        # (cfg_values, shape, plan, names) compiled on the first run and the
+        # schema_key of that plan, see compiled
+        self.compiled_plan = None
+        self.compiled_schema_key = None
+        # (cfg_constraints, validator) compiled on the first check
+        self.validator = None
+        # set by run_lazy, the lazy load and its prefetch are started once
+        self.lazy_started = False
+
+        # phase and hook times, the hooks are wrapped before the first one runs
+        self.stats = None
+        if stats or tracer is not None:
+            from app_config.stats import LoadStats
+            self.stats = LoadStats(tracer)
+            for name in self.hooks:
+                if getattr(type(self), name) is not getattr(ConfigParms, name):
+                    self.stats.overrides.add(name)
+                setattr(self, name, self.stats.wrap_hook(name, getattr(self, name)))
 
         # set the directories
         self.set_directories()
@@ -33,10 +332,32 @@ class ConfigParms:
         # custom init routine
         self.custom_init_routine()
 
-        cfg.config = configparser.ConfigParser(allow_no_value=True, comment_prefixes=None)
+        # [callback, variable names or None for all] added by subscribe
+        self.subscribers = []
+
+        # (sec, option) set by update and not yet written, see flush
+        self.write_delay = write_delay
+        self.dirty = set()
+        # the cfg file the dirty options are written to, set by update
+        self.dirty_flnm = None
+        self.write_timer = None
+        self.flush_at_exit = False
+
+        # background thread started by watch
+        self.watch_thread = None
+        self.watch_error = None
+
+        # shared memory created by share or attached to by attach
+        self.shared = None
+        self.shared_generation = None
+        # segments replaced by a larger one, kept until unshare
+        self.shared_moved = []
 
+        # comment lines are skipped when the cfg file is read
         self.prefixes = cfg.sys_comment_prefixes
 
+        cfg.config = self.new_config()
+
         if autorun:
             self.run()
 
@@ -45,72 +366,1083 @@ class ConfigParms:
             Add any additional custom cfg values
            """
         if cfg.wkdir is None:
-            # Find the path to the config module
-            config_spec = importlib.util.find_spec("src.config")
-            if config_spec is None and config_spec.origin is None:
-                raise FileNotFoundError("config.py not found in the module search path.")
-
-            cfg.wkdir_path = Path(config_spec.origin).resolve()
-            cfg.srcdir = str(cfg.wkdir_path.parent) + os.sep
-            cfg.wkdir = str(Path(cfg.srcdir).resolve().parent) + os.sep
-            cfg.datadir = str(Path(cfg.wkdir).resolve()) + os.sep + 'data' + os.sep
+            # the path to the config module
+            cfg.wkdir_path, cfg.srcdir, cfg.wkdir, cfg.datadir = resolve_directories(cfg.__file__)
 
     def custom_init_routine(self,) -> None:
         """ This is where code can be insterted to customize the init of the class and set custom values that are not being defined in the config.py module
         """
         pass
 
+    def phase(self, name):
+        """ context manager timing the phase name in self.stats """
+        if self.stats is None:
+            from app_config.stats import NO_PHASE
+            return NO_PHASE
+        return self.stats.phase(name)
+
+    def backend(self,):
+        """ the backend that reads and writes the cfg file, from the extension
+            of cfg_flnm, see app_config.backends
+        """
+        return backend_for(cfg.cfg_flnm)
+
+    def new_config(self,):
+        """ create the ConfigParser object the cfg file is read into
+            comments are not kept in config, write_cfg writes the cfg_comments
+        """
+        if self.interpolation:
+            from app_config.interpolation import GraphInterpolation
+            return self.backend().new_config(self.prefixes, GraphInterpolation())
+        return self.backend().new_config(self.prefixes)
+
+    def value_formatter(self,):
+        """ the function converting a cfg module value to the value set in config """
+        backend = self.backend()
+        return backend.format_value if backend.native else format_value
+
     def run(self,) -> None:
         """ read the config file, if not found, write the default file,
             set the values in the config module
         """
-        # the config is a ConfigParser object, and can be
-        # updated by read_config_file, so it is returned
-        config = self.read_config_file(cfg.config)
+        with self.phase('run'):
+            # the config is a ConfigParser object, and can be
+            # updated by read_config_file, so it is returned
+            config = self.read_config_file(cfg.config)
 
-        self.set_config_module_variables(config)
+            self.set_config_module_variables(config)
+
+            if self.cache and self.cached_values is None:
+                with self.phase('save_cache'):
+                    self.save_cache(config)
+            self.cached_values = None
 
         return
 
-    def read_config_file(self, config):
-        """read in the config file if exists or create it"""
-        if Path(f"{cfg.datadir}{cfg.cfg_flnm}").is_file():
-            config.read(f"{cfg.datadir}{cfg.cfg_flnm}")
-            # as of 3.14, comments are not auto removed at read
-            self.remove_default_comments(config)
+    # reload the config file when it changes
+
+    def reload(self,) -> list:
+        """ re-read the config file into a new config object and set only the
+            variables whose values changed in the cfg module, the file is not
+            written, a missing file or another sys_cfg_version raises ValueError
+            and the values are kept
+            returns a list of (sec, option) that changed
+        """
+        with self.phase('reload'):
+            config = self.read_config_file(self.new_config(), rewrite=False)
+            changed = self.apply_reload(config)
+
+            if self.cache and self.cached_values is None:
+                with self.phase('save_cache'):
+                    self.save_cache(config)
+            self.cached_values = None
+
+        return changed
+
+    def apply_reload(self, config) -> list:
+        """ set the variables that differ between cfg.config and the reloaded
+            config in the cfg module, config replaces cfg.config
+            returns a list of (sec, option) that changed
+        """
+        with self.load_lock:
+            previous = cfg.__dict__.get('snapshot')
+            changed = self.apply_changes(cfg.config, config)
+        if changed:
+            self.notify_subscribers(previous)
+        return changed
+
+    def apply_changes(self, old_config, config) -> list:
+        """ set the changed variables and publish them with config """
+        self.staged = {}
+        changed = []
+        for sec, vars, converters in self.plan():
+            old_items = dict(old_config.items(sec)) if old_config.has_section(sec) else {}
+            new_items = dict(config.items(sec)) if config.has_section(sec) else {}
+            if old_items == new_items:
+                continue
+
+            keys = [k for k in old_items.keys() | new_items.keys()
+                    if old_items.get(k, _MISSING) != new_items.get(k, _MISSING)]
+            changed.extend((sec, k) for k in sorted(keys))
+
+            only = {var[0] for var in converters if config.optionxform(var[0]) in keys}
+            self.set_section_variables(config, sec, vars, converters, only=only)
+
+        # invalid values are not published
+        if changed:
+            self.validate_values()
+
+        # the config object is replaced with the changed values
+        self.staged['config'] = config
+        self.publish()
+        if changed:
+            self.set_custom_module_vars(config)
+            self.publish_snapshot()
+            if self.sections:
+                self.publish_sections()
+
+        return changed
+
+    def file_stamp(self,):
+        """ the modification time and size of the config file, None if missing
+            and the stamps of the layered files
+        """
+        try:
+            st = os.stat(self.artifact_flnm() if self.artifact else f"{cfg.datadir}{cfg.cfg_flnm}")
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size, self.layer_stamps())
+
+    def watch(self, interval=1.0, callback=None) -> None:
+        """ reload the config file on a background thread when it changes
+            the file is checked every interval seconds, on linux inotify
+            wakes the thread as soon as the data directory changes
+            callback(changed) is called after a reload that changed values
+        """
+        import threading
+
+        self.unwatch()
+        self.watch_stop = threading.Event()
+        # changes made after watch returns are seen by the thread
+        stamp = self.file_stamp()
+        self.watch_thread = threading.Thread(target=self.watch_loop, args=(interval, callback, stamp),
+                                             name='app_config-watch', daemon=True)
+        self.watch_thread.start()
+
+    def unwatch(self,) -> None:
+        """ stop the thread started by watch """
+        if self.watch_thread is not None:
+            self.watch_stop.set()
+            self.watch_thread.join()
+            self.watch_thread = None
+
+    def watch_loop(self, interval, callback, stamp) -> None:
+        """ check the config file for changes until unwatch is called """
+        from app_config.inotify import Inotify
+        try:
+            notify = Inotify(cfg.datadir)
+        except OSError:
+            # poll the file stamp
+            notify = None
+
+        try:
+            while not self.watch_stop.is_set():
+                if notify is not None:
+                    notify.wait(interval)
+                else:
+                    self.watch_stop.wait(interval)
+
+                if self.watch_stop.is_set() or self.file_stamp() == stamp:
+                    continue
+
+                try:
+                    changed = self.reload()
+                except Exception as e:
+                    # keep the current values until the file is corrected
+                    self.watch_error = e
+                    stamp = self.file_stamp()
+                    continue
+
+                self.watch_error = None
+                # the stamp of the file that was read
+                stamp = self.file_stamp()
+                if changed and callback is not None:
+                    callback(changed)
+        finally:
+            if notify is not None:
+                notify.close()
+
+    # asyncio, the file io runs on a worker thread and the cfg module is set
+    # on the event loop thread
+
+    async def arun(self,) -> None:
+        """ run without blocking the event loop """
+        import asyncio
+        config = await asyncio.to_thread(self.read_config_file, cfg.config)
+
+        self.set_config_module_variables(config)
+
+        if self.cache and self.cached_values is None:
+            await asyncio.to_thread(self.save_cache, config)
+        self.cached_values = None
+
+    async def areload(self,) -> list:
+        """ reload without blocking the event loop """
+        import asyncio
+        config = await asyncio.to_thread(self.read_config_file, self.new_config(), False)
+        changed = self.apply_reload(config)
+
+        if self.cache and self.cached_values is None:
+            await asyncio.to_thread(self.save_cache, config)
+        self.cached_values = None
+
+        return changed
+
+    async def awatch(self, interval=1.0, callback=None) -> None:
+        """ reload when the config file changes, until the task is cancelled
+            on linux inotify wakes the task as soon as the data directory changes
+            callback(changed) may be a function or a coroutine function
+        """
+        import asyncio
+        import inspect
+        from app_config.inotify import Inotify
+
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+        try:
+            notify = Inotify(cfg.datadir)
+            loop.add_reader(notify.fd, lambda: (notify.wait(0), wakeup.set()))
+        except (OSError, NotImplementedError):
+            notify = None
+
+        stamp = await asyncio.to_thread(self.file_stamp)
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), interval)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+
+                if await asyncio.to_thread(self.file_stamp) == stamp:
+                    continue
+
+                try:
+                    changed = await self.areload()
+                except Exception as e:
+                    # keep the current values until the file is corrected
+                    self.watch_error = e
+                    stamp = await asyncio.to_thread(self.file_stamp)
+                    continue
+
+                self.watch_error = None
+                # the stamp of the file that was read
+                stamp = await asyncio.to_thread(self.file_stamp)
+                if changed and callback is not None:
+                    result = callback(changed)
+                    if inspect.isawaitable(result):
+                        await result
+        finally:
+            if notify is not None:
+                loop.remove_reader(notify.fd)
+                notify.close()
+
+    # lazy loading, the sections are set in the cfg module on first access
+
+    def run_lazy(self, prefetch=True) -> None:
+        """ remove the cfg_values variables from the cfg module so the cfg module
+            __getattr__ calls lazy_value, which sets the section of the
+            variable on first access.
+            if prefetch, the config file is read on a background thread
+            the lazy load is started once, a second call (ie cfg.run after
+            the run_init of config.py) does nothing
+        """
+        if self.lazy_started:
+            return
+        self.lazy_started = True
+        self.lazy_defaults = {}
+        self.lazy_sections = {}
+        for sec, vars, converters in self.plan():
+            for var_name, var_type, convert in converters:
+                if var_name in cfg.__dict__:
+                    self.lazy_defaults[var_name] = cfg.__dict__.pop(var_name)
+                self.lazy_sections[var_name] = (sec, vars, converters)
+
+        self.lazy_lock = self.load_lock
+        self.lazy_config = None
+        self.lazy_error = None
+        self.lazy_reader = None
+        self.lazy_pending = set()
+        self.lazy_custom = False
+        self.typed_values = {}
+
+        self.lazy_thread = None
+        if prefetch:
+            import threading
+            self.lazy_thread = threading.Thread(target=self.lazy_read, name='app_config-prefetch', daemon=True)
+            self.lazy_thread.start()
+
+    def lazy_read(self) -> None:
+        """ read the config file, while reading the defaults are returned
+            for variables accessed by the reading thread
+        """
+        self.lazy_reader = get_ident()
+        try:
+            self.lazy_config = self.read_config_file(cfg.config)
+        except Exception as e:
+            self.lazy_error = e
+        finally:
+            self.lazy_reader = None
+
+    def lazy_value(self, name):
+        """ return a variable from the cfg module, setting its section on first access """
+        entry = self.lazy_sections.get(name) if hasattr(self, 'lazy_sections') else None
+        if entry is None:
+            raise AttributeError(f"module {cfg.__name__!r} has no attribute {name!r}")
+
+        # the reader (ie verify or default hooks) sees the defaults
+        if get_ident() == self.lazy_reader:
+            return self.lazy_defaults.get(name)
+
+        # joined before the lock is held, the prefetch takes the load lock
+        # when it rewrites a cfg file with an old version
+        if self.lazy_config is None and self.lazy_thread is not None:
+            self.lazy_thread.join()
+
+        sec, vars, converters = entry
+        with self.lazy_lock:
+            if name in cfg.__dict__:
+                # set by another thread while waiting for the lock
+                return cfg.__dict__[name]
+            if sec in self.lazy_pending:
+                # accessed by a hook while its section is being set
+                return self.lazy_defaults.get(name)
+
+            if self.lazy_config is None:
+                if self.lazy_thread is None:
+                    self.lazy_read()
+                if self.lazy_error is not None:
+                    raise self.lazy_error
+
+            self.lazy_pending.add(sec)
+            try:
+                self.staged = {}
+                self.set_section_variables(self.lazy_config, sec, vars, converters)
+                self.validate_values()
+                self.publish()
+                # variables skipped by the hooks keep their default
+                for var_name, var_type, convert in converters:
+                    if var_name not in cfg.__dict__ and var_name in self.lazy_defaults:
+                        setattr(cfg, var_name, self.lazy_defaults[var_name])
+            finally:
+                self.lazy_pending.discard(sec)
+
+            if not self.lazy_custom:
+                self.lazy_custom = True
+                self.set_custom_module_vars(self.lazy_config)
+
+        try:
+            return cfg.__dict__[name]
+        except KeyError:
+            raise AttributeError(f"module {cfg.__name__!r} has no attribute {name!r}") from None
+
+    def read_config_file(self, config, rewrite=True):
+        """read in the config file if exists or create it
+            if not rewrite, ie on a reload, the file is only read: a missing
+            file or one without the current sys_cfg_version raises ValueError
+            and the cfg module is not changed
+        """
+        self.partial_loaded = False
+        self.cached_values = None
+        self.layer_values = {}
+        self.layer_base = {}
+        if self.artifact:
+            with self.phase('load_artifact'):
+                self.load_artifact(config)
+            return config
+
+        if self.cache:
+            with self.phase('load_cache'):
+                loaded = self.load_cache(config)
+            if loaded:
+                # a cache saved from a partial load only has the cfg_values sections
+                self.partial_loaded = self.partial_load
+                if self.interpolation:
+                    from app_config.interpolation import resolve
+                    with self.phase('interpolate'):
+                        resolve(config)
+                return config
+
+        flnm = f"{cfg.datadir}{cfg.cfg_flnm}"
+        if not rewrite and not os.path.isfile(flnm):
+            raise ValueError(f"the cfg file {flnm} is missing, the values are not reloaded")
+        if os.path.isfile(flnm):
+            with self.phase('read'):
+                backend = self.backend()
+                # the section index is only kept for ini files
+                if not (self.partial_load and not backend.native and self.read_partial(config, flnm)):
+                    backend.read(self, config, flnm)
         else:
             # create the default config file
-            config = self.set_default_config(config)
-            self.write_cfg(config)
+            with self.phase('default_file'):
+                config = self.set_default_config(config)
+                with self.phase('write_cfg'):
+                    self.write_cfg(config)
 
         # if the sys_version is different, write out the new config file
         if not config.has_option('SYSTEM', 'sys_cfg_version') or cfg.sys_cfg_version != config.get('SYSTEM', 'sys_cfg_version'):
-            self.set_config_module_variables(config)
-            self.set_default_config(config)
-            self.write_cfg(config)
-
-        # remove comments from sections to be consistent with data from read
-        self.remove_default_comments(config)
+            if not rewrite:
+                # ie an editor is saving the file, a later reload reads it
+                version = config.get('SYSTEM', 'sys_cfg_version', fallback=None)
+                raise ValueError(f"the cfg file {flnm} has sys_cfg_version {version}, not {cfg.sys_cfg_version}, "
+                                 f"the values are not reloaded")
+            with self.phase('version_rewrite'):
+                self.set_config_module_variables(config)
+                self.set_default_config(config)
+                with self.phase('write_cfg'):
+                    self.write_cfg(config)
 
         # verify all attributes are present in config
-        self.verify_config_attributes(config)
+        with self.phase('verify'):
+            self.verify_config_attributes(config)
+
+        # overlays and conf.d files override the values of the cfg file
+        with self.phase('layers'):
+            self.apply_layers(config)
+
+        # a cycle or a missing reference fails the load
+        if self.interpolation:
+            from app_config.interpolation import resolve
+            with self.phase('interpolate'):
+                resolve(config)
 
         return config
 
-    def write_cfg(self, config):
-        """ write the cfg file from the current cfg settings"""
-        with open(f"{cfg.datadir}{cfg.cfg_flnm}", 'w') as configfile:
-            config.write(configfile)
+    def read_lines(self, config, lines, source) -> None:
+        """ parse the lines of a cfg file into config """
+        if self.fast_reader:
+            from app_config.inireader import read_ini
+            # comments are dropped by the reader
+            self.store_sections(config, read_ini(lines, self.prefixes, config.optionxform, source))
+        else:
+            config.read_file(lines, source)
+
+    def store_sections(self, config, data) -> None:
+        """ store the {section: {option: value}} read by read_ini in config """
+        # the values are stored as ConfigParser.read stores them, read_dict
+        # is used if the parser does not keep its sections in _sections
+        store = getattr(config, '_sections', None)
+        for sec, options in data.items():
+            if store is None:
+                config.read_dict({sec: options})
+                continue
+            if sec == config.default_section:
+                # read_dict would make the typed values of a json or toml file str
+                config._defaults.update(options)
+                continue
+            if not config.has_section(sec):
+                config.add_section(sec)
+            store[sec].update(options)
+
+        if self.interpolation:
+            from app_config.interpolation import reset
+            reset(config)
+
+    # partial load of the sections in cfg_values
+
+    def index_flnm(self) -> str:
+        """ the section index is kept next to the cfg file """
+        return f"{cfg.datadir}.{cfg.cfg_flnm}.idx"
+
+    def section_index(self, flnm, mm) -> dict:
+        """ return {section: [start, end]} byte offsets of the sections in the
+            mapped cfg file, the index file is rebuilt when the file changes
+        """
+        import json
+        import locale
+
+        st = os.stat(flnm)
+        stamp = [st.st_mtime_ns, st.st_size]
+        try:
+            with open(self.index_flnm(), 'r') as f:
+                index = json.load(f)
+            if index.get('stamp') == stamp:
+                return index['sections']
+        except (OSError, ValueError):
+            pass
+
+        sections = {}
+        prev = None
+        for m in _SECTION_RE.finditer(mm):
+            if prev is not None:
+                sections[prev[0]] = [prev[1], m.start()]
+            prev = (m.group(1).decode(locale.getpreferredencoding(False)), m.start())
+        if prev is not None:
+            sections[prev[0]] = [prev[1], len(mm)]
+
+        tmp_flnm = f"{self.index_flnm()}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_flnm, 'w') as f:
+                json.dump({'stamp': stamp, 'sections': sections}, f)
+            os.replace(tmp_flnm, self.index_flnm())
+        except OSError:
+            # the index is rebuilt on the next run
+            if os.path.exists(tmp_flnm):
+                os.remove(tmp_flnm)
+
+        return sections
+
+    def read_partial(self, config, flnm) -> bool:
+        """ read only the sections in cfg_values using the section index
+            returns False if the whole file must be read, ie the version changed
+        """
+        import locale
+        import mmap
+
+        encoding = locale.getpreferredencoding(False)
+        try:
+            with open(flnm, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                index = self.section_index(flnm, mm)
+                # the DEFAULT section is inherited by the sections read
+                for sec in dict.fromkeys([config.default_section, *self.cfg_values]):
+                    if sec in index:
+                        start, end = index[sec]
+                        text = mm[start:end].decode(encoding)
+                        self.read_lines(config, text.splitlines(keepends=True), flnm)
+        except ValueError:
+            # an empty file cannot be mapped
+            return False
+
+        if not config.has_option('SYSTEM', 'sys_cfg_version') or cfg.sys_cfg_version != config.get('SYSTEM', 'sys_cfg_version'):
+            return False
+
+        self.partial_loaded = True
+        return True
+
+    def merge_partial(self, config, flnm=None):
+        """ add the sections not loaded by read_partial from the cfg file,
+            keeping the order and comments of the file
+        """
+        flnm = flnm or f"{cfg.datadir}{cfg.cfg_flnm}"
+        full = configparser.RawConfigParser(allow_no_value=True, comment_prefixes=None)
+        full.optionxform = config.optionxform
+        if os.path.isfile(flnm):
+            with open(flnm, 'r') as f:
+                full.read_file(f, flnm)
+
+        merged = configparser.RawConfigParser(allow_no_value=True, comment_prefixes=None)
+        merged.optionxform = config.optionxform
+        # the DEFAULT options are kept in their section, not copied to each section
+        merged.read_dict({merged.default_section: {**full.defaults(), **config.defaults()}})
+        sections = full.sections() + [s for s in config.sections() if not full.has_section(s)]
+        for sec in sections:
+            source = config if config.has_section(sec) else full
+            merged.read_dict({sec: section_items(source, sec)})
+        return merged
+
+    # layered files, overlays and conf.d override the cfg file
+
+    def layer_files(self) -> list:
+        """ the existing layered files in order of precedence, lowest first
+            cfg_overlays are file names in the data directory, then every *.cfg
+            in the cfg_confd directory in name order
+        """
+        files = []
+        for flnm in getattr(cfg, 'cfg_overlays', None) or []:
+            files.append(os.path.join(cfg.datadir, flnm))
+
+        confd = getattr(cfg, 'cfg_confd', None)
+        if confd:
+            confd = os.path.join(cfg.datadir, confd)
+            try:
+                names = sorted(n for n in os.listdir(confd) if n.endswith('.cfg'))
+            except FileNotFoundError:
+                names = []
+            files.extend(os.path.join(confd, n) for n in names)
+
+        return [f for f in files if os.path.isfile(f)]
+
+    def layer_stamps(self) -> tuple:
+        """ (path, mtime, size) of each layered file """
+        stamps = []
+        for flnm in self.layer_files():
+            try:
+                st = os.stat(flnm)
+            except FileNotFoundError:
+                continue
+            stamps.append((flnm, st.st_mtime_ns, st.st_size))
+        return tuple(stamps)
+
+    def read_layer(self, stamp) -> dict:
+        """ parse a layered file into {section: {option: value}}, the DEFAULT
+            options are kept in DEFAULT, not copied into each section
+            the file is parsed again only when its stamp changes
+        """
+        flnm = stamp[0]
+        entry = self.layer_cache.get(flnm)
+        if entry is not None and entry[0] == stamp:
+            return entry[1]
+
+        # a layered file is read by the backend for its own extension
+        backend = backend_for(flnm)
+        config = backend.new_config(self.prefixes)
+        backend.read(self, config, flnm)
+        data = {sec: section_items(config, sec) for sec in config.sections()}
+        if config.defaults():
+            data[config.default_section] = dict(config.defaults())
+        self.layer_cache[flnm] = (stamp, data)
+        return data
+
+    def read_layers(self) -> dict:
+        """ merge the layered files in order, the files that changed are parsed
+            on a thread pool, but the parse holds the GIL so the files are in
+            effect read one after another
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        stamps = self.layer_stamps()
+        changed = [st for st in stamps if self.layer_cache.get(st[0], (None,))[0] != st]
+        if len(changed) > 1:
+            with ThreadPoolExecutor(max_workers=min(8, len(changed))) as pool:
+                list(pool.map(self.read_layer, changed))
+
+        merged = {}
+        for stamp in stamps:
+            for sec, options in self.read_layer(stamp).items():
+                merged.setdefault(sec, {}).update(options)
+        return merged
+
+    def apply_layers(self, config) -> None:
+        """ set the layered values in config, the values they replace are kept
+            so write_cfg does not write the layered values to the cfg file
+        """
+        if not getattr(cfg, 'cfg_overlays', None) and not getattr(cfg, 'cfg_confd', None):
+            return
+
+        self.layer_values = self.read_layers()
+        self.layer_base = {}
+        for sec, options in self.layer_values.items():
+            if sec == config.default_section or config.has_section(sec):
+                base = config.defaults() if sec == config.default_section else section_items(config, sec)
+                self.layer_base[sec] = {k: base[k] for k in options if k in base}
+            else:
+                self.layer_base[sec] = None
+        self.store_sections(config, self.layer_values)
+
+    def strip_layers(self, config):
+        """ return a copy of config with the layered values replaced by the
+            cfg file values, values changed by the application are kept
+        """
+        base = configparser.RawConfigParser(allow_no_value=True, comment_prefixes=None)
+        base.optionxform = config.optionxform
+        self.store_sections(base, {config.default_section: dict(config.defaults()),
+                                   **{sec: section_items(config, sec) for sec in config.sections()}})
+
+        for sec, options in self.layer_values.items():
+            if sec != base.default_section and not base.has_section(sec):
+                continue
+            base_options = self.layer_base.get(sec) or {}
+            for opt, value in options.items():
+                if base.get(sec, opt, fallback=_MISSING) != value:
+                    continue
+                if opt in base_options:
+                    base.set(sec, opt, base_options[opt])
+                else:
+                    base.remove_option(sec, opt)
+            if self.layer_base.get(sec) is None and sec != base.default_section and not section_items(base, sec):
+                base.remove_section(sec)
+        return base
+
+    def write_cfg(self, config, flnm=None):
+        """ write the cfg file from the current cfg settings, flnm defaults to
+            the cfg file of the cfg module
+            the file is rendered in memory and not rewritten if it is unchanged,
+            otherwise a temp file is written, synced and renamed over the cfg file
+            so a reader never sees a partial file
+        """
+        flnm = flnm or f"{cfg.datadir}{cfg.cfg_flnm}"
+        if self.layer_values:
+            # overlay values are not written to the cfg file
+            config = self.strip_layers(config)
+        if self.partial_loaded:
+            # do not drop the sections that were not read
+            config = self.merge_partial(config, flnm)
+
+        self.write_text(flnm, backend_for(flnm).render(self, config))
         return
 
+    def write_text(self, flnm, text) -> bool:
+        """ replace the file flnm with text, the file is not rewritten if it
+            is unchanged, returns True if it was written
+        """
+        try:
+            with open(flnm, 'r') as f:
+                if f.read() == text:
+                    return False
+            mode = os.stat(flnm).st_mode
+        except (FileNotFoundError, UnicodeDecodeError):
+            mode = None
+
+        tmp_flnm = f"{flnm}.{os.getpid()}.{get_ident()}.tmp"
+        try:
+            with open(tmp_flnm, 'w') as configfile:
+                configfile.write(text)
+                configfile.flush()
+                os.fsync(configfile.fileno())
+            if mode is not None:
+                os.chmod(tmp_flnm, mode)
+            os.replace(tmp_flnm, flnm)
+        except BaseException:
+            if os.path.exists(tmp_flnm):
+                os.remove(tmp_flnm)
+            raise
+
+        self.sync_dir(os.path.dirname(flnm))
+        return True
+
+    def render_cfg(self, config) -> str:
+        """ the text of the cfg file in the format of ConfigParser.write
+            the cfg_comments are written after a section header and before
+            a cfg_values variable, the DEFAULT section is written first and
+            its options are not repeated in the other sections
+        """
+        comments = self.cfg_comments
+        var_comments = self.var_comments(config)
+
+        buf = io.StringIO()
+        write = buf.write
+        defaults = config.defaults()
+        if defaults:
+            write(f"[{config.default_section}]\n")
+            for key, value in defaults.items():
+                write(option_text(key, value))
+            write("\n")
+        for sec in config.sections():
+            write(f"[{sec}]\n")
+            if sec in self.cfg_values:
+                for c in comments.get(sec, ()):
+                    write(f"# {c}\n")
+            for key, value in section_items(config, sec).items():
+                for c in var_comments.get((sec, key), ()):
+                    write(f"# {c}\n")
+                write(option_text(key, value))
+            write("\n")
+        return buf.getvalue()
+
+    def var_comments(self, config) -> dict:
+        """ {(sec, option): comments} of the cfg_values variables """
+        comments = self.cfg_comments
+        var_comments = {}
+        for sec, vars in self.cfg_values.items():
+            for var in vars:
+                if var[0] in comments:
+                    var_comments[(sec, config.optionxform(var[0]))] = comments[var[0]]
+        return var_comments
+
+    def sync_dir(self, dirname) -> None:
+        """ sync the directory so a rename in it survives a crash, not on windows """
+        if os.name == 'nt':
+            return
+        try:
+            fd = os.open(dirname or '.', os.O_RDONLY)
+        except OSError:
+            return
+        try:
+            os.fsync(fd)
+        except OSError:
+            pass
+        finally:
+            os.close(fd)
+
+    # updates made by the application, written back in batches
+
+    def update(self, values=None, **kwargs) -> None:
+        """ set cfg_values variables in the cfg module and in cfg.config, ie
+            cfg.cp.update({'var2': 5}, m1='text')
+            the values are converted as if read from the cfg file and checked
+            against cfg_constraints, the cfg file is written write_delay seconds
+            later with the other updates made meanwhile, see flush
+        """
+        values = dict(values or {}, **kwargs)
+        plan = self.compiled()[3]
+        unknown = [name for name in values if name not in plan]
+        if unknown:
+            raise ValueError(f"not cfg_values variables: {', '.join(unknown)}")
+
+        formatter = self.value_formatter()
+        with self.load_lock:
+            previous = cfg.__dict__.get('snapshot')
+            config = cfg.config
+            options = {}
+            self.staged = {}
+            for name, value in values.items():
+                sec, var_type, convert = plan[name]
+                option = formatter(var_type, value)
+                # the value a reload of the written file would set
+                if convert is not _MISSING:
+                    value = convert_value(option, var_type, convert)
+                options[name] = (sec, option)
+                self.staged[name] = value
+            self.validate_values()
+
+            # the updates are written to the cfg file of the update, the
+            # updates to another file are written first
+            flnm = f"{cfg.datadir}{cfg.cfg_flnm}"
+            if self.dirty and self.dirty_flnm != flnm:
+                self.flush()
+            self.dirty_flnm = flnm
+            for name, (sec, option) in options.items():
+                if not config.has_section(sec):
+                    config.add_section(sec)
+                config.set(sec, name, option)
+                self.typed_values.setdefault(sec, {})[name] = self.staged[name]
+                self.dirty.add((sec, config.optionxform(name)))
+            self.publish()
+            self.set_custom_module_vars(config)
+            self.publish_snapshot()
+            if self.sections:
+                self.publish_sections()
+            self.schedule_write()
+
+        self.notify_subscribers(previous)
+
+    def schedule_write(self,) -> None:
+        """ start the timer writing the updates, unless one is waiting """
+        if not self.dirty:
+            return
+        if not self.write_delay or self.write_delay <= 0:
+            self.flush()
+            return
+        if self.write_timer is None:
+            import threading
+            if not self.flush_at_exit:
+                import atexit
+                atexit.register(self.flush)
+                self.flush_at_exit = True
+            self.write_timer = threading.Timer(self.write_delay, self.flush)
+            self.write_timer.daemon = True
+            self.write_timer.start()
+
+    def flush(self,) -> bool:
+        """ write the updated options now, the lines of the options are
+            replaced in the cfg file, the whole file is written if an option
+            is not in it or the file is not ini
+            returns True if there were updates to write
+        """
+        with self.load_lock:
+            timer, self.write_timer = self.write_timer, None
+            if timer is not None:
+                timer.cancel()
+            dirty, self.dirty = self.dirty, set()
+            if not dirty:
+                return False
+            config = cfg.config
+            flnm = self.dirty_flnm
+            try:
+                with self.phase('write_cfg'):
+                    if backend_for(flnm).native or not self.patch_cfg(config, dirty, flnm):
+                        self.write_cfg(config, flnm)
+            except BaseException:
+                # written by the next flush
+                self.dirty |= dirty
+                raise
+        return True
+
+    def patch_cfg(self, config, keys, flnm=None) -> bool:
+        """ replace the lines of the options keys, (sec, option), in the cfg file
+            flnm, default the cfg file of the cfg module
+            returns False if the file or an option is not found
+        """
+        flnm = flnm or f"{cfg.datadir}{cfg.cfg_flnm}"
+        try:
+            with open(flnm, 'r') as f:
+                lines = f.readlines()
+        except (FileNotFoundError, UnicodeDecodeError):
+            return False
+
+        optionxform = config.optionxform
+        out = []
+        found = set()
+        sec = None
+        skip = False
+        for line in lines:
+            # the continuation lines of a replaced value
+            if skip and line[:1] in (' ', '\t') and line.strip():
+                continue
+            skip = False
+            stripped = line.strip()
+            if stripped.startswith('[') and stripped.endswith(']'):
+                sec = stripped[1:-1]
+            elif stripped and line[:1] not in (' ', '\t') and stripped[:1] not in self.prefixes:
+                key = optionxform(re.split(r'[=:]', stripped, maxsplit=1)[0].strip())
+                if (sec, key) in keys and (sec, key) not in found and config.has_option(sec, key):
+                    out.append(option_text(key, config.get(sec, key, raw=True)))
+                    found.add((sec, key))
+                    skip = True
+                    continue
+            out.append(line)
+
+        if found != set(keys):
+            return False
+        self.write_text(flnm, "".join(out))
+        return True
+
+    # cache of the parsed cfg file
+
+    def cache_flnm(self) -> str:
+        """ the cache file is kept next to the cfg file """
+        return f"{cfg.datadir}.{cfg.cfg_flnm}.cache"
+
+    def cache_key(self):
+        """ identify the cfg file contents and the schema used to load it
+            returns None if the cfg file does not exist
+        """
+        import hashlib
+
+        flnm = f"{cfg.datadir}{cfg.cfg_flnm}"
+        try:
+            st = os.stat(flnm)
+            with open(flnm, 'rb') as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except FileNotFoundError:
+            return None
+
+        # the options that shape the load, a partial load caches only the
+        # cfg_values sections and interpolation changes the typed values
+        return (os.path.abspath(flnm), st.st_mtime_ns, st.st_size, digest, cfg.sys_cfg_version, self.schema_key(),
+                self.layer_stamps(), self.partial_load, self.fast_reader, self.interpolation)
+
+    def compiled(self,) -> tuple:
+        """ (cfg_values, shape, plan, {var_name: (sec, var_type, convert)})
+            compiled once for each cfg_values, and again when a section or a
+            variable is added or removed.  A type changed in place is not
+            seen, replace cfg_values to change one
+        """
+        shape = tuple(len(vars) for vars in self.cfg_values.values())
+        entry = self.compiled_plan
+        if entry is None or entry[0] is not self.cfg_values or entry[1] != shape:
+            plan = compile_plan(self.cfg_values)
+            names = {var_name: (sec, var_type, convert)
+                     for sec, vars, converters in plan
+                     for var_name, var_type, convert in converters}
+            self.compiled_plan = entry = (self.cfg_values, shape, plan, names)
+            self.compiled_schema_key = None
+        return entry
+
+    def plan(self,) -> list:
+        """ the compile_plan of cfg_values, see compiled """
+        return self.compiled()[2]
+
+    def schema_key(self) -> str:
+        """ identify the cfg_values a cache or artifact was built with,
+            computed once for each compiled plan
+        """
+        self.compiled()
+        if self.compiled_schema_key is None:
+            import hashlib
+            self.compiled_schema_key = hashlib.sha256(repr(self.cfg_values).encode()).hexdigest()
+        return self.compiled_schema_key
+
+    def load_cache(self, config) -> bool:
+        """ load config and the typed values from the cache file
+            returns False if there is no usable cache for the cfg file
+        """
+        from app_config import artifact
+
+        flnm = self.cache_flnm()
+        try:
+            with open(flnm, 'rb') as f:
+                # the data directory may be shared, a cache another user
+                # can write is not used
+                st = os.fstat(f.fileno())
+                if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & 0o022):
+                    return False
+                payload = artifact.loads(f.read(), flnm)
+        except Exception:
+            return False
+
+        if not isinstance(payload, dict) or payload.get('key') != self.cache_key():
+            return False
+
+        self.load_values_payload(config, payload)
+        return True
+
+    def save_cache(self, config) -> None:
+        """ save the parsed sections and typed values to the cache file """
+        from app_config import artifact
+
+        key = self.cache_key()
+        if key is None:
+            return
+
+        try:
+            artifact.write(self.cache_flnm(), {'key': key, **self.values_payload(config)})
+        except (OSError, ValueError):
+            # the cache is optional, a failed write only costs a parse next time
+            pass
+
+    def values_payload(self, config) -> dict:
+        """ the config sections and the typed values of the last run, the
+            payload of the cache and the artifact
+        """
+        # arrays are not marshalled, they are kept as the cfg text and
+        # converted again when the payload is loaded
+        values = {}
+        arrays = []
+        for sec, sec_values in self.typed_values.items():
+            types = {var[0]: var[1] for var in self.cfg_values.get(sec, ()) if len(var) > 1}
+            values[sec] = dict(sec_values)
+            for var_name, value in sec_values.items():
+                if types.get(var_name) in ('ai', 'af'):
+                    values[sec][var_name] = format_value(types[var_name], value)
+                    arrays.append((sec, var_name, types[var_name]))
+
+        return {'sections': {config.default_section: dict(config.defaults()),
+                             **{s: section_items(config, s) for s in config.sections()}},
+                'values': values,
+                'arrays': arrays,
+                'layers': (self.layer_values, self.layer_base),
+                }
+
+    def load_values_payload(self, config, payload) -> None:
+        """ load config and the typed values from a values_payload """
+        values = payload['values']
+        for sec, var_name, var_type in payload['arrays']:
+            values[sec][var_name] = converters[var_type](values[sec][var_name])
+        self.store_sections(config, payload['sections'])
+        self.cached_values = values
+        self.layer_values, self.layer_base = payload['layers']
+
+    # compiled artifact of the typed values, see app_config.compile_config
+
+    def artifact_flnm(self) -> str:
+        """ the artifact path, by default next to the cfg file """
+        if isinstance(self.artifact, str):
+            return self.artifact
+        return f"{cfg.datadir}{cfg.cfg_flnm}.bin"
+
+    def save_artifact(self, config, flnm=None) -> str:
+        """ write the config sections and the typed values of the last run
+            to the artifact file, returns the path written
+        """
+        from app_config import artifact
+
+        flnm = flnm or self.artifact_flnm()
+        payload = {'sys_cfg_version': cfg.sys_cfg_version,
+                   'schema': self.schema_key(),
+                   **self.values_payload(config),
+                   }
+        try:
+            artifact.write(flnm, payload)
+        except ValueError as e:
+            raise artifact.ArtifactError(f"{flnm}: a value cannot be written to the artifact, {e}") from None
+        return flnm
+
+    def load_artifact(self, config) -> None:
+        """ load config and the typed values from the artifact file
+            raises ArtifactError if it was compiled for another sys_cfg_version
+            or cfg_values
+        """
+        from app_config import artifact
+
+        flnm = self.artifact_flnm()
+        payload = artifact.read(flnm)
+        if payload.get('sys_cfg_version') != cfg.sys_cfg_version:
+            raise artifact.ArtifactError(f"{flnm} was compiled for sys_cfg_version {payload.get('sys_cfg_version')}, "
+                                         f"the cfg module is {cfg.sys_cfg_version}")
+        if payload.get('schema') != self.schema_key():
+            raise artifact.ArtifactError(f"{flnm} was compiled for other cfg_values")
+
+        self.load_values_payload(config, payload)
+
     def set_default_config(self, config):
         """define the default config file, adding varibles with default values """
+        formatter = self.value_formatter()
         for sec, vars in self.cfg_values.items():
             # create the section
             if not config.has_section(sec):
                 config.add_section(sec)
             config[sec].clear()
-            self.check_for_comments(sec)
 
             next_iter = self.set_custom_default_sects(config, sec, vars)
             if next_iter:
@@ -118,21 +1450,13 @@ class ConfigParms:
 
             for var in vars:
                 var_name = var[0]
-                # check for comments and add them if they exists
-                self.check_for_comments(sec, var_name)
 
                 next_iter = self.set_custom_default_vars(config, sec, vars, var_name)
                 if next_iter:
                     continue
 
-                # add the variable
-                if var[1] == 'l':
-                    # process list - convert to string
-                    listitems = getattr(cfg, var_name)
-                    list_str = ",".join(x for x in listitems)
-                    config.set(sec, var_name, list_str)
-                else:
-                    config.set(sec, var_name, str(getattr(cfg, var_name)))
+                # add the variable, lists and arrays are converted for the file format
+                config.set(sec, var_name, formatter(var[1], getattr(cfg, var_name)))
 
         return config
 
@@ -155,46 +1479,303 @@ class ConfigParms:
 
     def set_config_module_variables(self, config):
         """set the cfg module variables from config for consistant access"""
+        with self.load_lock:
+            previous = cfg.__dict__.get('snapshot')
+            self.typed_values = {}
+            self.staged = {}
+            with self.phase('convert'):
+                for sec, vars, converters in self.plan():
+                    self.set_section_variables(config, sec, vars, converters)
+
+            with self.phase('validate'):
+                self.validate_values()
+
+            with self.phase('publish'):
+                self.publish()
+                self.set_custom_module_vars(config)
+                self.publish_snapshot()
+                if self.sections:
+                    self.publish_sections()
+
+        self.notify_subscribers(previous)
+        return config
+
+    def validate_values(self,) -> None:
+        """ check the staged values, and the cfg module values they replace,
+            against cfg.cfg_constraints
+            raises ConfigValidationError listing every error
+        """
+        constraints = getattr(cfg, 'cfg_constraints', None)
+        if not constraints:
+            return
+
+        from collections import ChainMap
+        from app_config.validation import ConfigValidationError, compile_validator
+
+        if self.validator is None or self.validator[0] is not constraints:
+            self.validator = (constraints, compile_validator(constraints, self.cfg_values))
+        errors = self.validator[1](ChainMap(self.staged, cfg.__dict__))
+        if errors:
+            self.staged = {}
+            raise ConfigValidationError(errors)
+
+    def publish(self,) -> None:
+        """ set the staged values in the cfg module with a single update """
+        cfg.__dict__.update(self.staged)
+        self.staged = {}
+
+    def publish_snapshot(self,) -> None:
+        """ replace cfg.snapshot with a ConfigSnapshot of the cfg_values variables
+            readers holding the previous snapshot are not affected
+        """
+        from app_config.snapshot import ConfigSnapshot
+
+        values = cfg.__dict__
+        sections = {sec: {var[0]: values[var[0]] for var in vars if var[0] in values}
+                    for sec, vars in self.cfg_values.items()}
+        previous = values.get('snapshot')
+        generation = previous.generation + 1 if isinstance(previous, ConfigSnapshot) else 1
+        cfg.snapshot = ConfigSnapshot(sections, generation)
+
+        # workers attached to the shared memory see the new generation
+        if self.shared is not None and self.shared.owner:
+            import pickle
+            payload = pickle.dumps(sections, protocol=pickle.HIGHEST_PROTOCOL)
+            if self.shared.fits(payload):
+                self.shared.write(payload)
+            else:
+                self.move_shared(payload)
+
+    def publish_sections(self,) -> None:
+        """ set a ConfigSection object in the cfg module for each cfg_values
+            section, built from the typed values of the section so two
+            sections may have a variable with the same name
+            a section named like another cfg module variable is not set
+        """
+        from app_config.sections import ConfigSection, section_class, make_section
+
+        module = cfg.__dict__
         for sec, vars in self.cfg_values.items():
+            current = module.get(sec)
+            if current is not None and not isinstance(current, ConfigSection):
+                continue
+            fields = tuple(var[0] for var in vars)
+            sec_values = self.typed_values.get(sec, {})
+            values = {name: sec_values[name] if name in sec_values else module[name]
+                      for name in fields if name in sec_values or name in module}
+            module[sec] = make_section(section_class(sec, fields), values)
 
-            next_iter = self.set_module_sects(config, sec, vars)
-            if next_iter:
+    # change subscriptions
+
+    def subscribe(self, callback, *names):
+        """ call callback(changes) after a run, reload or shared memory update
+            that changed a variable named, or a variable of a section named,
+            all the cfg_values variables if no names are given
+            changes is {var: (old value, new value)} from the snapshots, one
+            call per load with every change of the subscribed variables
+            returns callback
+        """
+        keys = None
+        if names:
+            sections = {sec: [var[0] for var in vars] for sec, vars in self.cfg_values.items()}
+            variables = {var[0] for vars in self.cfg_values.values() for var in vars}
+            keys = []
+            for name in names:
+                if name in sections:
+                    keys.extend(sections[name])
+                elif name in variables:
+                    keys.append(name)
+                else:
+                    raise ValueError(f"{name} is not a cfg_values section or variable")
+            keys = tuple(dict.fromkeys(keys))
+        self.subscribers.append([callback, keys])
+        return callback
+
+    def unsubscribe(self, callback) -> None:
+        """ remove the subscriptions of callback """
+        self.subscribers = [s for s in self.subscribers if s[0] is not callback]
+
+    def notify_subscribers(self, previous) -> None:
+        """ call the subscribers whose variables differ between the previous
+            snapshot and cfg.snapshot, none are called on the first load
+            an exception from a callback is raised after the others are called
+        """
+        if not self.subscribers:
+            return
+        from app_config.snapshot import ConfigSnapshot
+
+        current = cfg.__dict__.get('snapshot')
+        if not isinstance(previous, ConfigSnapshot) or current is previous:
+            return
+
+        # each variable is compared once for all the subscribers
+        diffs = {}
+        def diff(names):
+            changes = {}
+            for name in names:
+                change = diffs.get(name, _MISSING)
+                if change is _MISSING:
+                    old = previous.get(name)
+                    new = current.get(name)
+                    change = None if same_value(old, new) else (old, new)
+                    diffs[name] = change
+                if change is not None:
+                    changes[name] = change
+            return changes
+
+        error = None
+        for callback, keys in list(self.subscribers):
+            changes = diff(dict.fromkeys([*current, *previous]) if keys is None else keys)
+            if not changes:
                 continue
+            try:
+                callback(changes)
+            except Exception as e:
+                if error is None:
+                    error = e
+        if error is not None:
+            raise error
 
-            for var in vars:
-                var_name = var[0]
-                # do not override the module version number
-                if var_name == 'sys_cfg_version':
-                    continue
+    # share the values with worker processes
 
-                next_iter = self.set_module_vars(config, sec, vars, var_name)
-                if next_iter:
-                    continue
+    def share(self, name=None, size=None) -> str:
+        """ copy the current values to shared memory for worker processes,
+            each later run or reload writes a new generation
+            returns the name of the shared memory, forked workers inherit it
+            as cp.shared.name
+        """
+        import pickle
+        from app_config.sharedmem import SharedValues
+
+        self.unshare()
+        values = cfg.__dict__
+        sections = {sec: {var[0]: values[var[0]] for var in vars if var[0] in values}
+                    for sec, vars in self.cfg_values.items()}
+        self.shared = SharedValues(name, size, pickle.dumps(sections, protocol=pickle.HIGHEST_PROTOCOL))
+        return self.shared.name
+
+    def move_shared(self, payload) -> None:
+        """ write payload to a new larger segment, the old segment holds the
+            name of the new one so attached workers move to it
+        """
+        import pickle
+        from app_config.sharedmem import SharedValues
+
+        old = self.shared
+        self.shared = SharedValues(None, None, payload, old.generation)
+        old.write(pickle.dumps(self.shared.name, protocol=pickle.HIGHEST_PROTOCOL))
+        self.shared_moved.append(old)
+
+    def unshare(self,) -> None:
+        """ close the shared memory, the process that shared it removes it """
+        if self.shared is not None:
+            self.shared.close()
+            self.shared = None
+        for shared in self.shared_moved:
+            shared.close()
+        self.shared_moved = []
+
+    def attach(self, name=None) -> None:
+        """ set the cfg module from the values in shared memory, the cfg file
+            is not read and cfg.config is not built
+            name defaults to the shared memory inherited from the parent
+        """
+        from app_config.sharedmem import SharedValues
+
+        if name is None and self.shared is not None:
+            name = self.shared.name
+        if self.shared is not None and self.shared.owner and self.shared.name != name:
+            self.unshare()
+        self.shared = SharedValues(name)
+        self.shared_generation = None
+        self.check_shared()
 
+    def check_shared(self,) -> bool:
+        """ set the cfg module if the shared memory has a new generation,
+            a cheap check that workers can make on each request
+            returns True if the values changed
+        """
+        if self.shared is None or self.shared.generation == self.shared_generation:
+            return False
+
+        import pickle
+        from app_config.snapshot import ConfigSnapshot
+
+        generation, payload = self.shared.read()
+        sections = pickle.loads(payload)
+        if isinstance(sections, str):
+            # the values outgrew the segment and were moved to a new one
+            self.shared.close()
+            self.shared = None
+            self.attach(sections)
+            return True
+        with self.load_lock:
+            previous = cfg.__dict__.get('snapshot')
+            for sec_values in sections.values():
+                cfg.__dict__.update(sec_values)
+            # the worker has no config, the hook derives its values from the cfg module
+            self.set_custom_module_vars(None)
+            cfg.snapshot = ConfigSnapshot(sections, generation)
+        self.shared_generation = generation
+        self.notify_subscribers(previous)
+        return True
+
+    def set_section_variables(self, config, sec, vars, converters, only=None) -> None:
+        """set the cfg module variables of one section using its compiled converters
+            the values are added to self.staged, publish sets them in the cfg module
+            if only is a set of variable names, the other variables are not changed
+        """
+        sec_values = self.typed_values.setdefault(sec, {})
+        cached = self.cached_values.get(sec, {}) if self.cached_values else {}
+
+        next_iter = self.set_module_sects(config, sec, vars)
+        if next_iter:
+            return
+
+        # bind the hook and lookups once, they are used for every variable
+        set_module_vars = self.set_module_vars
+        optionxform = config.optionxform
+        staged = self.staged
+
+        # the section values are interpolated once, not per variable
+        items = dict(config.items(sec)) if config.has_section(sec) else {}
+
+        for var_name, var_type, convert in converters:
+            if only is not None and var_name not in only:
+                continue
+
+            next_iter = set_module_vars(config, sec, vars, var_name)
+            if next_iter or convert is _MISSING:
+                # unknown types are left as set in the cfg module
+                continue
+
+            # value already converted on a previous run
+            if var_name in cached:
+                value = cached[var_name]
+            else:
                 # set variable from config value
-                match var[1]:
-                    case 'b':
-                        setattr(cfg, var_name, config.getboolean(sec, var_name, fallback=getattr(cfg, var_name)))
-                    case 'f':
-                        setattr(cfg, var_name, config.getfloat(sec,var_name, fallback=getattr(cfg, var_name)))
-                    case 'i':
-                        setattr(cfg, var_name, config.getint(sec, var_name, fallback=getattr(cfg, var_name)))
-                    case 'l':
-                        # convert string to list
-                        listitems = []
-                        list_str = config.get(sec, var_name, fallback=getattr(cfg, var_name))
-                        if isinstance(list_str, str):
-                            listitems = [x.strip() for x in list_str.split(',')]
-                        else:
-                            # if list_str not str, then it is the fallback list
-                            listitems = list_str
-                        setattr(cfg, var_name, listitems)
-                    case 's':
-                        setattr(cfg, var_name, config.get(sec, var_name, fallback=getattr(cfg, var_name)))
-
-        self.set_custom_module_vars(config)
+                value = items.get(optionxform(var_name), _MISSING)
+                if value is _MISSING:
+                    # not in config, keep the value in the cfg module
+                    value = getattr(cfg, var_name)
+                    if var_type == 'l' and isinstance(value, str):
+                        value = convert(value)
+                    elif var_type in _convert_defaults:
+                        value = convert(value)
+                elif isinstance(value, str):
+                    if convert is not None:
+                        value = convert(value)
+                elif value is not None:
+                    # a typed value from a json or toml file is checked
+                    try:
+                        value = convert_value(value, var_type, convert)
+                    except ValueError as e:
+                        raise ValueError(f"{sec}.{var_name}: {e}") from None
+                elif var_type in _convert_native:
+                    value = convert(value)
 
-        return config
+            staged[var_name] = value
+            sec_values[var_name] = value
 
     def set_module_sects(self, config, sec, vars) -> bool:
         """ special processing for module sections """
@@ -215,25 +1796,15 @@ class ConfigParms:
         pass
 
     def check_for_comments(self, sec, var_name=None):
-        """set comments in config, if they exist for a sec or variable,
-            comments are set after a section and before a variable
-            comments will be written to file, then removed from config later
-        """
-        # temp patch to remove comments from init file
-        # if sys.version_info < (3,14):
-        #     return
-        
-        if var_name is None:
-            if sec in self.cfg_comments.keys():
-                for c in self.cfg_comments[sec]:
-                    cfg.config.set(sec, f"# {c}")
-        else:
-            if var_name in self.cfg_comments.keys():
-                for c in self.cfg_comments[var_name]:
-                    cfg.config.set(sec, f"# {c}")
+        """ comments are no longer set in config, render_cfg writes the
+            cfg_comments.  Kept for subclasses that call it
+        """
+        pass
 
     def remove_default_comments(self, config):
-        """remove the comments set up in the defaults"""
+        """remove comment options from config, a config read with the
+            comment_prefixes of new_config has none.  Kept for subclasses
+        """
         for s in config.sections():
             # the key is a tuple (key, value)
             for key in config[s].items():
@@ -242,6 +1813,7 @@ class ConfigParms:
 
     def verify_config_attributes(self, config):
         """verify all attributes are present in config"""
+        formatter = self.value_formatter()
         for sec, vars in self.cfg_values.items():
             # create the section
             if not config.has_section(sec):
@@ -260,14 +1832,8 @@ class ConfigParms:
 
                 # if variable does not exist
                 if not config.has_option(sec, var_name):
-                    # add the variable
-                    if var[1] == 'l':
-                        # process list - convert to string
-                        listitems = getattr(cfg, var_name)
-                        list_str = ",".join(x for x in listitems)
-                        config.set(sec, var_name, list_str)
-                    else:
-                        config.set(sec, var_name, str(getattr(cfg, var_name)))
+                    # add the variable, lists and arrays are converted for the file format
+                    config.set(sec, var_name, formatter(var[1], getattr(cfg, var_name)))
 
     def verify_config_sects(self, config, sec, vars) -> bool:
         """ special processing for module groups """
@@ -9,11 +9,8 @@
 #  Licensed under the Apache License, Version 2.0
 #  http://www.apache.org/licenses/LICENSE-2.0
 
-from pathlib import Path
-import os
-import importlib.util
 import src.config as cfg
-from app_config.configparms import ConfigParms
+from app_config.configparms import ConfigParms, resolve_directories
 
 # ----------------------------------------------------------------
 # NOTE:
@@ -28,11 +25,12 @@ class ConfigParmsExt(ConfigParms):
     """ This class extends the ConfigParms class allowing overrides of
         base class
     """
-    def __init__(self, cfg_values=cfg.cfg_values, cfg_comments=cfg.cfg_comments, autorun=False):
+    def __init__(self, cfg_values=cfg.cfg_values, cfg_comments=cfg.cfg_comments, autorun=False, **kwargs):
         """ on init, load the directory paths,
             if autorun read the cfg file
+            kwargs are options passed to ConfigParms, ie cache=True
         """
-        super().__init__(cfg_values, cfg_comments, autorun)
+        super().__init__(cfg_values, cfg_comments, autorun, **kwargs)
 
     def set_directories(self,) -> None:
         """ set the working directory paths in cfg if the project
@@ -41,15 +39,9 @@ class ConfigParmsExt(ConfigParms):
             The default code is provided
         """
         if cfg.wkdir is None:
-            # Find the path to the config module
-            config_spec = importlib.util.find_spec("src.config")
-            if config_spec is None and config_spec.origin is None:
-                raise FileNotFoundError("config.py not found in the module search path.")
-
-            cfg.wkdir_path = Path(config_spec.origin).resolve()
-            cfg.srcdir = str(cfg.wkdir_path.parent) + os.sep
-            cfg.wkdir = str(Path(cfg.srcdir).resolve().parent) + os.sep
-            cfg.datadir = str(Path(cfg.wkdir).resolve()) + os.sep + 'data' + os.sep
+            # the path to the config module, resolved once for the process
+            # APP_CONFIG_DATADIR sets cfg.datadir in place of wkdir/data
+            cfg.wkdir_path, cfg.srcdir, cfg.wkdir, cfg.datadir = resolve_directories(cfg.__file__)
 
     def custom_init_routine(self,) -> None:
         """ Run any custom process need during init of the class.
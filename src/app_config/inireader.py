@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  inireader.py
+#     single pass reader for the cfg files written by ConfigParms,
+#     used in place of ConfigParser.read when fast_reader is set
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import configparser
+
+def read_ini(lines, comment_prefixes=('#', ';'), optionxform=str.lower, fpname='<ini>') -> dict:
+    """ read the lines of an ini file into {section: {option: value}}
+
+        The format is the one ConfigParser writes:
+          - [section] headers
+          - option = value or option : value, the first delimiter is used
+          - an option without a delimiter has the value None
+          - indented lines continue the value of the previous option
+          - lines starting with a comment prefix are dropped, there are
+            no inline comments
+        Duplicate sections or options raise the ConfigParser errors.
+    """
+    prefixes = tuple(comment_prefixes)
+    data = {}
+    options = None
+    # the option whose value can be continued and the indent of its line
+    cur_option = None
+    cur_value = None
+    cur_indent = 0
+
+    for lineno, line in enumerate(lines, start=1):
+        value = line.strip()
+        if not value:
+            if cur_value is not None:
+                # blank lines are kept inside a multi line value
+                cur_value.append('')
+            continue
+        if value.startswith(prefixes):
+            continue
+
+        indent = len(line) - len(line.lstrip())
+        if cur_value is not None and indent > cur_indent:
+            cur_value.append(value)
+            continue
+
+        # a new section or option ends the continued value
+        if cur_value is not None:
+            options[cur_option] = '\n'.join(cur_value).rstrip()
+        cur_option = cur_value = None
+
+        if value[0] == '[' and ']' in value:
+            header = value[1:value.rindex(']')]
+            if header in data:
+                raise configparser.DuplicateSectionError(header, fpname, lineno)
+            options = data[header] = {}
+            continue
+
+        if options is None:
+            raise configparser.MissingSectionHeaderError(fpname, lineno, line)
+
+        # split on the first delimiter
+        eq = value.find('=')
+        colon = value.find(':')
+        if eq < 0 or (0 <= colon < eq):
+            eq = colon
+
+        if eq < 0:
+            option = optionxform(value)
+            option_value = None
+        else:
+            option = optionxform(value[:eq].rstrip())
+            option_value = value[eq + 1:].lstrip()
+        if not option:
+            raise configparser.ParsingError(fpname)
+        if option in options:
+            raise configparser.DuplicateOptionError(header, option, fpname, lineno)
+
+        if option_value is None:
+            options[option] = None
+        else:
+            cur_option = option
+            cur_value = [option_value]
+            cur_indent = indent
+
+    if cur_value is not None:
+        options[cur_option] = '\n'.join(cur_value).rstrip()
+
+    return data
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  inotify.py
+#     wait for changes in a directory using the linux inotify api,
+#     used by ConfigParms.watch to avoid waiting a full poll interval
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import ctypes
+import os
+import select
+import sys
+
+# inotify event masks, see inotify(7)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+class Inotify:
+    """ watch a directory for files being written, replaced or removed
+        raises OSError if inotify is not available on the platform
+    """
+
+    def __init__(self, path):
+        """ open the inotify instance and add the watch for path """
+        if not sys.platform.startswith('linux'):
+            raise OSError("inotify is only available on linux")
+
+        libc = ctypes.CDLL(None, use_errno=True)
+        if not hasattr(libc, 'inotify_init1'):
+            raise OSError("inotify is not available in libc")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        mask = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {path}")
+
+    def wait(self, timeout) -> bool:
+        """ wait up to timeout seconds for an event
+            returns True if there was an event in the directory
+        """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return False
+
+        # drain the queued events, only the wake up is used
+        try:
+            while os.read(self.fd, 4096):
+                pass
+        except BlockingIOError:
+            pass
+        return True
+
+    def close(self) -> None:
+        """ close the inotify instance, this removes the watch """
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
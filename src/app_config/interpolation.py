@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  interpolation.py
+#     ${key} and ${SECTION:key} references resolved once per load, used
+#     when ConfigParms is created with interpolation=True
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import configparser
+import re
+
+# $$ or ${reference}, a $ followed by anything else is kept as is
+_REF_RE = re.compile(r'\$(?:(\$)|\{([^}]*)\}|(\{))')
+
+class InterpolationCycleError(configparser.InterpolationError):
+    """ the values reference each other """
+
+    def __init__(self, option, section, cycle):
+        self.cycle = cycle
+        path = " -> ".join(f"{sec}:{opt}" for sec, opt in cycle)
+        super().__init__(option, section, f"references form a cycle: {path}")
+
+class GraphInterpolation(configparser.Interpolation):
+    """ ${key} references an option of the same section, or of the DEFAULT
+        section, ${SECTION:key} an option of another section and $$ is a $
+
+        On the first get after the parser changes every value is parsed once
+        into a graph of its references, the graph is resolved in dependency
+        order and the results are kept, so each later get is a dict lookup.
+        A cycle or a missing reference raises on the get of the values that
+        depend on it, see resolve to check the whole parser at once.
+    """
+
+    def __init__(self):
+        # {(section, option): (raw value, resolved value)}, None until built
+        self.values = None
+        # {(section, option): InterpolationError} of the values that fail
+        self.errors = {}
+
+    def reset(self) -> None:
+        """ forget the resolved values, the parser changed """
+        self.values = None
+        self.errors = {}
+
+    def before_get(self, parser, section, option, value, defaults):
+        if self.values is None:
+            self.build(parser)
+        key = (section, option)
+        entry = self.values.get(key)
+        if entry is not None and entry[0] is value:
+            return entry[1]
+        error = self.errors.get(key)
+        if error is not None:
+            raise error
+        # a value passed in vars or changed without set, it is not kept
+        return self.expand(parser, section, option, value, {})
+
+    def before_set(self, parser, section, option, value):
+        if isinstance(value, str):
+            for match in _REF_RE.finditer(value):
+                if match.group(3):
+                    raise ValueError(f"invalid interpolation syntax in {value!r} at position {match.start()}")
+        self.reset()
+        return value
+
+    def before_read(self, parser, section, option, value):
+        self.reset()
+        return value
+
+    def build(self, parser) -> None:
+        """ resolve every value of parser in dependency order """
+        raw = raw_values(parser)
+        values = {}
+        errors = {}
+        refs = {}
+        for key, value in raw.items():
+            if not isinstance(value, str) or '$' not in value:
+                values[key] = (value, value)
+                continue
+            try:
+                refs[key] = parse(parser, key[0], key[1], value)
+            except configparser.InterpolationError as e:
+                errors[key] = e
+
+        # depth first, a value is resolved after the values it references
+        state = {}
+        for start in refs:
+            if start in state:
+                continue
+            stack = [(start, iter(refs[start]))]
+            state[start] = 'open'
+            while stack:
+                key, pending = stack[-1]
+                for item in pending:
+                    if isinstance(item, str):
+                        continue
+                    ref = item
+                    if ref in refs and ref not in state and ref not in errors:
+                        state[ref] = 'open'
+                        stack.append((ref, iter(refs[ref])))
+                        break
+                    if state.get(ref) == 'open':
+                        path = [k for k, _ in stack]
+                        cycle = path[path.index(ref):] + [ref]
+                        for k in cycle[:-1]:
+                            errors.setdefault(k, InterpolationCycleError(k[1], k[0], cycle))
+                else:
+                    stack.pop()
+                    state[key] = 'done'
+                    if key not in errors:
+                        self.join(key, raw[key], refs[key], raw, values, errors)
+
+        self.values = values
+        self.errors = errors
+
+    @staticmethod
+    def join(key, value, parts, raw, values, errors) -> None:
+        """ set values[key] from its parsed parts, the references are resolved """
+        out = []
+        for part in parts:
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            entry = values.get(part)
+            if entry is None:
+                error = errors.get(part)
+                if isinstance(error, InterpolationCycleError):
+                    errors[key] = error
+                elif error is not None:
+                    errors[key] = configparser.InterpolationError(
+                        key[1], key[0], f"references {part[0]}:{part[1]}, {error.message}")
+                else:
+                    errors[key] = configparser.InterpolationMissingOptionError(
+                        key[1], key[0], value, f"{part[0]}:{part[1]}")
+                return
+            out.append(str(entry[1]))
+        values[key] = (value, "".join(out))
+
+    def expand(self, parser, section, option, value, defaults):
+        """ resolve one value with the resolved values of the parser """
+        if not isinstance(value, str) or '$' not in value:
+            return value
+        out = []
+        for part in parse(parser, section, option, value):
+            if isinstance(part, str):
+                out.append(part)
+                continue
+            entry = self.values.get(part)
+            if entry is None:
+                raise self.errors.get(part) or configparser.InterpolationMissingOptionError(
+                    option, section, value, f"{part[0]}:{part[1]}")
+            out.append(str(entry[1]))
+        return "".join(out)
+
+def raw_values(parser) -> dict:
+    """ {(section, option): raw value} of every option, the DEFAULT options
+        are also keyed by each section that inherits them
+    """
+    default = parser.default_section
+    defaults = parser.defaults()
+    raw = {(default, opt): value for opt, value in defaults.items()}
+    for sec in parser.sections():
+        options = parser._sections[sec]
+        for opt, value in defaults.items():
+            if opt not in options:
+                raw[(sec, opt)] = value
+        for opt, value in options.items():
+            raw[(sec, opt)] = value
+    return raw
+
+def parse(parser, section, option, value) -> list:
+    """ the text and (section, option) references of value """
+    parts = []
+    pos = 0
+    for match in _REF_RE.finditer(value):
+        parts.append(value[pos:match.start()])
+        pos = match.end()
+        if match.group(1):
+            parts.append('$')
+            continue
+        if match.group(3):
+            raise configparser.InterpolationSyntaxError(
+                option, section, f"'${{' is not closed in {value!r}")
+        ref = match.group(2).split(':')
+        if len(ref) == 1:
+            parts.append((section, parser.optionxform(ref[0])))
+        elif len(ref) == 2:
+            parts.append((ref[0], parser.optionxform(ref[1])))
+        else:
+            raise configparser.InterpolationSyntaxError(
+                option, section, f"more than one ':' in ${{{match.group(2)}}}")
+    parts.append(value[pos:])
+    return [p for p in parts if p != '']
+
+def resolve(config) -> None:
+    """ resolve the values of config now, raises the first cycle or missing
+        reference so a load fails before any value is used
+    """
+    interpolation = getattr(config, '_interpolation', None)
+    if not isinstance(interpolation, GraphInterpolation):
+        return
+    interpolation.reset()
+    interpolation.build(config)
+    if interpolation.errors:
+        raise next(iter(interpolation.errors.values()))
+
+def reset(config) -> None:
+    """ forget the resolved values after config is changed without set """
+    interpolation = getattr(config, '_interpolation', None)
+    if isinstance(interpolation, GraphInterpolation):
+        interpolation.reset()
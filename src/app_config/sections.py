@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  sections.py
+#     one object per cfg_values section, set as cfg.<section> when
+#     ConfigParms is created with sections=True
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+class ConfigSection:
+    """ the values of one section as attributes, cfg.MAIN.var1
+
+        Each section has its own class with a slot per variable, built once
+        from cfg_values.  A section object is not changed, a run or reload
+        sets a new one, so a component can keep the section it was given.
+    """
+
+    __slots__ = ()
+    _section = None
+    _fields = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"section {self._section} cannot be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"section {self._section} cannot be changed")
+
+    def __iter__(self):
+        """ the variable names """
+        return iter(self._fields)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self._asdict() == other._asdict()
+
+    __hash__ = None
+
+    def _asdict(self) -> dict:
+        """ {var: value} """
+        return {name: getattr(self, name) for name in self._fields if hasattr(self, name)}
+
+    def __repr__(self):
+        values = ", ".join(f"{k}={v!r}" for k, v in self._asdict().items())
+        return f"{self._section}({values})"
+
+# section classes keyed by (section, variable names)
+_classes = {}
+
+def section_class(sec, fields):
+    """ the ConfigSection subclass for sec with a slot for each field """
+    key = (sec, fields)
+    cls = _classes.get(key)
+    if cls is None:
+        cls = type(f"{sec}Section", (ConfigSection,), {'__slots__': fields, '_section': sec, '_fields': fields})
+        _classes[key] = cls
+    return cls
+
+def make_section(cls, values):
+    """ an instance of cls with the fields found in values {var: value} """
+    obj = object.__new__(cls)
+    set_slot = object.__setattr__
+    for name in cls._fields:
+        if name in values:
+            set_slot(obj, name, values[name])
+    return obj
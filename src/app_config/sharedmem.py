@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  sharedmem.py
+#     share the converted cfg values with worker processes through
+#     multiprocessing.shared_memory, see ConfigParms.share and attach
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+# header: sequence number, odd while the payload is being written, and the
+# payload length
+HEADER = struct.Struct('<QQ')
+MIN_SIZE = 64 * 1024
+
+class SharedValues:
+    """ a shared memory segment holding one payload and its generation
+
+        The owner writes, the workers read.  The sequence number is made odd
+        before the payload is written and even after, a reader retries while
+        it is odd or when it changed during the read.
+    """
+
+    def __init__(self, name=None, size=None, payload=None, generation=0):
+        """ create a segment if payload is given, otherwise attach to name
+            a created segment continues from generation
+        """
+        self.owner = payload is not None
+        if self.owner:
+            size = max(size or 0, MIN_SIZE, HEADER.size + 2 * len(payload))
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+            HEADER.pack_into(self.shm.buf, 0, 2 * generation, 0)
+            self.write(payload)
+        else:
+            self.shm = attach_segment(name)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def generation(self) -> int:
+        """ the number of payloads written """
+        return HEADER.unpack_from(self.shm.buf, 0)[0] // 2
+
+    def fits(self, payload) -> bool:
+        """ True if payload fits in the segment """
+        return HEADER.size + len(payload) <= len(self.shm.buf)
+
+    def write(self, payload) -> None:
+        """ replace the payload, raises ValueError if it does not fit """
+        buf = self.shm.buf
+        if not self.fits(payload):
+            raise ValueError(f"payload of {len(payload)} bytes does not fit in shared memory {self.name}, "
+                             f"share with a larger size")
+        seq = HEADER.unpack_from(buf, 0)[0]
+        HEADER.pack_into(buf, 0, seq + 1, 0)
+        buf[HEADER.size:HEADER.size + len(payload)] = payload
+        HEADER.pack_into(buf, 0, seq + 2, len(payload))
+
+    def read(self, retries=1000):
+        """ return (generation, payload) """
+        buf = self.shm.buf
+        for _ in range(retries):
+            seq, length = HEADER.unpack_from(buf, 0)
+            if seq % 2 == 0:
+                payload = bytes(buf[HEADER.size:HEADER.size + length])
+                if HEADER.unpack_from(buf, 0)[0] == seq:
+                    return seq // 2, payload
+            # the owner is writing
+            time.sleep(0.0001)
+        raise TimeoutError(f"shared memory {self.name} is being written")
+
+    def close(self) -> None:
+        """ close the segment, the owner also removes it """
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+def attach_segment(name):
+    """ attach to an existing segment without registering it with the
+        resource tracker, which would remove it when the worker exits
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+
+    # before 3.13 the registration cannot be turned off, the segment is
+    # unregistered once attached; patching resource_tracker.register would
+    # also skip the segments other threads create meanwhile
+    shm = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix':
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    return shm
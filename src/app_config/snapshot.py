@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  snapshot.py
+#     an immutable view of the cfg_values variables, published as
+#     cfg.snapshot each time ConfigParms sets the cfg module
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+from array import array
+from collections.abc import Mapping
+from types import MappingProxyType
+
+def _freeze(value):
+    """ a value the cfg module cannot change through the snapshot, lists are
+        tuples, arrays are copied and a numpy copy is read only
+    """
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, array):
+        return array(value.typecode, value)
+    if type(value).__module__ == 'numpy' and hasattr(value, 'flags'):
+        value = value.copy()
+        value.flags.writeable = False
+    return value
+
+class ConfigSnapshot(Mapping):
+    """ the values of the cfg_values variables from one run or reload
+
+        Values are read as attributes or items, snap.var1 or snap['var1'].
+        A snapshot is never changed, a new one replaces cfg.snapshot, so
+        a reader that keeps a reference sees a consistent set of values:
+
+            snap = cfg.snapshot
+            connect(snap.host, snap.port)
+
+        Lists are stored as tuples and arrays as copies, a numpy array is
+        read only.
+    """
+
+    __slots__ = ('_values', '_sections', 'generation')
+
+    def __init__(self, sections, generation=0):
+        """ sections is {sec: {var: value}} """
+        values = {}
+        frozen = {}
+        for sec, sec_values in sections.items():
+            sec_frozen = {k: _freeze(v) for k, v in sec_values.items()}
+            values.update(sec_frozen)
+            frozen[sec] = MappingProxyType(sec_frozen)
+
+        object.__setattr__(self, '_values', values)
+        object.__setattr__(self, '_sections', MappingProxyType(frozen))
+        object.__setattr__(self, 'generation', generation)
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(f"snapshot has no variable {name!r}") from None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("a ConfigSnapshot cannot be changed")
+
+    def __delattr__(self, name):
+        raise AttributeError("a ConfigSnapshot cannot be changed")
+
+    def __getitem__(self, name):
+        return self._values[name]
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __len__(self):
+        return len(self._values)
+
+    def __repr__(self):
+        return f"ConfigSnapshot(generation={self.generation}, sections={list(self._sections)})"
+
+    @property
+    def sections(self):
+        """ read only {sec: {var: value}} """
+        return self._sections
+
+    def section(self, sec):
+        """ read only {var: value} of a section """
+        return self._sections[sec]
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  stats.py
+#     time spent in the phases of ConfigParms and in its hooks,
+#     kept when ConfigParms is created with stats=True or a tracer
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import time
+
+class NoPhase:
+    """ the context manager used for a phase when no stats are kept """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+NO_PHASE = NoPhase()
+
+class Phase:
+    """ times one phase, see LoadStats.phase """
+
+    __slots__ = ('stats', 'name', 'start')
+
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        end = time.perf_counter()
+        self.stats.add(self.stats.phases, self.name, end - self.start)
+        if self.stats.tracer is not None:
+            self.stats.tracer(self.name, self.start, end, exc is None)
+        return False
+
+class LoadStats:
+    """ call counts and seconds for each phase and hook
+
+        phases and hooks are {name: {'calls': n, 'time': seconds}}, a phase
+        includes the phases and hooks run inside it.  overrides is the set
+        of hooks replaced by a subclass, ie ConfigParmsExt.
+
+        tracer(name, start, end, ok) is called as each phase ends, start and
+        end are time.perf_counter() values, ok is False if the phase raised.
+    """
+
+    def __init__(self, tracer=None):
+        self.tracer = tracer
+        self.phases = {}
+        self.hooks = {}
+        self.overrides = set()
+
+    def phase(self, name):
+        """ context manager timing the phase name """
+        return Phase(self, name)
+
+    @staticmethod
+    def add(table, name, elapsed) -> None:
+        """ count a call of name taking elapsed seconds """
+        entry = table.get(name)
+        if entry is None:
+            table[name] = {'calls': 1, 'time': elapsed}
+        else:
+            entry['calls'] += 1
+            entry['time'] += elapsed
+
+    def wrap_hook(self, name, hook):
+        """ return hook counting its calls and time under name """
+        hooks = self.hooks
+        add = self.add
+        perf_counter = time.perf_counter
+
+        def timed_hook(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return hook(*args, **kwargs)
+            finally:
+                add(hooks, name, perf_counter() - start)
+
+        timed_hook.__name__ = name
+        timed_hook.__wrapped__ = hook
+        return timed_hook
+
+    def hook_time(self, overrides_only=False) -> float:
+        """ seconds spent in the hooks, or only in the overridden hooks """
+        return sum(entry['time'] for name, entry in self.hooks.items()
+                   if not overrides_only or name in self.overrides)
+
+    def reset(self) -> None:
+        """ clear the counts, ie before timing a reload """
+        self.phases.clear()
+        self.hooks.clear()
+
+    def report(self) -> str:
+        """ the phases and hooks as a printable table, slowest first """
+        lines = [f"{'phase':<24} {'calls':>8} {'ms':>10}"]
+        for name, entry in sorted(self.phases.items(), key=lambda item: -item[1]['time']):
+            lines.append(f"{name:<24} {entry['calls']:>8} {entry['time'] * 1000:>10.3f}")
+        lines.append(f"{'hook':<24} {'calls':>8} {'ms':>10}")
+        for name, entry in sorted(self.hooks.items(), key=lambda item: -item[1]['time']):
+            mark = ' *' if name in self.overrides else ''
+            lines.append(f"{name:<24} {entry['calls']:>8} {entry['time'] * 1000:>10.3f}{mark}")
+        if self.overrides:
+            lines.append("* overridden by the subclass")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"LoadStats(phases={self.phases}, hooks={self.hooks})"
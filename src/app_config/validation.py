@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  validation.py
+#     check the converted values against the cfg_constraints declared
+#     in config.py, the constraints are compiled once into a validator
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import re
+
+# constraint keys, see compile_validator
+RULES = ('min', 'max', 'choices', 'regex', 'check', 'message')
+
+_MISSING = object()
+
+class ConfigValidationError(ValueError):
+    """ the values do not meet cfg_constraints, errors lists every failure """
+
+    def __init__(self, errors):
+        self.errors = list(errors)
+        super().__init__("invalid config values:\n  " + "\n  ".join(self.errors))
+
+def is_collection(value) -> bool:
+    """ lists, sets and arrays are checked item by item """
+    return isinstance(value, (list, tuple, set, frozenset)) or hasattr(value, 'tolist')
+
+def compile_validator(constraints, cfg_values):
+    """ compile constraints into validate(values) -> list of error strings
+
+        constraints is {var_name: rules} or {(var_name, ...): rules} with the rules
+          min, max - the value or each item of a list, set or array is in range
+          choices  - the value or each item is one of choices
+          regex    - the string value or each item fully matches the pattern
+          check    - check(value) is true, for a tuple of names
+                     check(value1, value2, ...) is true, a cross field check
+          message  - replaces the error text
+        values is a mapping of the variable names to the converted values,
+        a constraint on a variable that is not in values is skipped
+    """
+    sections = {var[0]: sec for sec, vars in cfg_values.items() for var in vars}
+    checks = []
+    for key, rules in constraints.items():
+        unknown = set(rules) - set(RULES)
+        if unknown:
+            raise ValueError(f"unknown constraint {sorted(unknown)} for {key}")
+        if isinstance(key, tuple):
+            if 'check' not in rules:
+                raise ValueError(f"the constraint for {key} needs a check")
+            checks.append(cross_check(key, rules, sections))
+        else:
+            checks.append(var_check(key, rules, sections))
+
+    def validate(values):
+        errors = []
+        for check in checks:
+            check(values, errors)
+        return errors
+
+    return validate
+
+def item_tests(rules) -> list:
+    """ the (test, error) pairs for one value or item, test(item) is true if it fails """
+    tests = []
+    low = rules.get('min')
+    if low is not None:
+        tests.append((lambda item: item < low, lambda item: f"{item!r} is less than the min {low!r}"))
+    high = rules.get('max')
+    if high is not None:
+        tests.append((lambda item: item > high, lambda item: f"{item!r} is greater than the max {high!r}"))
+    choices = rules.get('choices')
+    if choices is not None:
+        try:
+            choices = frozenset(choices)
+        except TypeError:
+            choices = tuple(choices)
+        tests.append((lambda item: item not in choices,
+                      lambda item: f"{item!r} is not one of {sorted(map(repr, choices))}"))
+    regex = rules.get('regex')
+    if regex is not None:
+        match = re.compile(regex).fullmatch
+        tests.append((lambda item: not isinstance(item, str) or match(item) is None,
+                      lambda item: f"{item!r} does not match {regex!r}"))
+    return tests
+
+def var_check(name, rules, sections):
+    """ the check of one variable, the first failing item is reported """
+    label = f"{sections.get(name, '?')}.{name}"
+    tests = item_tests(rules)
+    check = rules.get('check')
+    message = rules.get('message')
+
+    def check_var(values, errors):
+        value = values.get(name, _MISSING)
+        if value is _MISSING:
+            return
+        items = value if is_collection(value) else (value,)
+        for test, error in tests:
+            for item in items:
+                try:
+                    failed = test(item)
+                except TypeError:
+                    failed = True
+                if failed:
+                    errors.append(f"{label}: {message or error(item)}")
+                    break
+        if check is not None:
+            run_check(check, (value,), label, message, errors)
+
+    return check_var
+
+def cross_check(names, rules, sections):
+    """ the check of several variables """
+    label = ", ".join(f"{sections.get(name, '?')}.{name}" for name in names)
+    check = rules['check']
+    message = rules.get('message')
+
+    def check_vars(values, errors):
+        args = tuple(values.get(name, _MISSING) for name in names)
+        if not any(arg is _MISSING for arg in args):
+            run_check(check, args, label, message, errors)
+
+    return check_vars
+
+def run_check(check, args, label, message, errors) -> None:
+    """ call check(*args), an exception is reported as an error """
+    try:
+        ok = check(*args)
+    except Exception as e:
+        errors.append(f"{label}: {message or f'check raised {e!r}'}")
+        return
+    if not ok:
+        errors.append(f"{label}: {message or 'check failed'}")
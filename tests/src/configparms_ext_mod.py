@@ -9,33 +9,24 @@
 #  Licensed under the Apache License, Version 2.0
 #  http://www.apache.org/licenses/LICENSE-2.0
 
-from pathlib import Path
 import os
-import importlib.util
 import src.config as cfg
-from app_config.configparms import ConfigParms
+from app_config.configparms import ConfigParms, resolve_directories
 
 class ConfigParmsExt(ConfigParms):
     """ This class extends the ConfigParms class allowing overrides of
         base class
     """
-    def __init__(self, cfg_values=cfg.cfg_values, cfg_comments=cfg.cfg_comments, autorun=False):
+    def __init__(self, cfg_values=cfg.cfg_values, cfg_comments=cfg.cfg_comments, autorun=False, **kwargs):
         """ on init, load the directory paths, if autorun read the cfg file"""
-        super().__init__(cfg_values, cfg_comments, autorun)
+        super().__init__(cfg_values, cfg_comments, autorun, **kwargs)
 
     # this method allow for changing the paths
     def set_directories(self,) -> None:
         """ set the working directory paths in cfg """
         if cfg.wkdir is None:
-            # Find the path to the config module
-            config_spec = importlib.util.find_spec("src.config")
-            if config_spec is None and config_spec.origin is None:
-                raise FileNotFoundError("config.py not found in the module search path.")
-
-            cfg.wkdir_path = Path(config_spec.origin).resolve()
-            cfg.srcdir = str(cfg.wkdir_path.parent) + os.sep
-            cfg.wkdir = str(Path(cfg.srcdir).resolve().parent) + os.sep
-            cfg.datadir = str(Path(cfg.wkdir).resolve()) + os.sep + 'data' + os.sep
+            # the path to the config module
+            cfg.wkdir_path, cfg.srcdir, cfg.wkdir, cfg.datadir = resolve_directories(cfg.__file__)
             cfg.datadir = f"testfiles{os.sep}"
             cfg.extdir = "added in set_directories"
 
@@ -8,9 +8,13 @@
 #  http://www.apache.org/licenses/LICENSE-2.0
 
 import unittest
+import asyncio
 import importlib
 import os
 import sys
+import threading
+import shutil
+import subprocess
 
 from src import setup_module
 
@@ -102,6 +106,25 @@ class TestConfig(unittest.TestCase):
         self.assertTrue(config.has_option("MAIN", "var2"))
         self.assertTrue(config.has_option("SYSTEM", "sys_var"))
 
+    def test_write_cfg(self,):
+        """test write_cfg skips an unchanged file and replaces a changed one """
+        flnm = f"{cfg.datadir}{cfg.cfg_flnm}"
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        cfg.cp.write_cfg(config)
+        stamp = os.stat(flnm).st_mtime_ns
+        cfg.cp.write_cfg(config)
+        self.assertEqual(os.stat(flnm).st_mtime_ns, stamp)
+
+        config.set('DATA', 'm1', 'written')
+        cfg.cp.write_cfg(config)
+        with open(flnm) as f:
+            self.assertIn('m1 = written', f.read())
+        # no temp files are left in the data directory
+        self.assertEqual([f for f in os.listdir(cfg.datadir) if f.endswith('.tmp')], [])
+
+        config.set('DATA', 'm1', 'textm1')
+        cfg.cp.write_cfg(config)
+
     def test_remove_default_comments(self,):
         """test remove_default_comments """
         # load the default values
@@ -112,6 +135,50 @@ class TestConfig(unittest.TestCase):
         for k in comments.keys():
             self.assertFalse(config.has_option("DATA", k))
 
+    def test_comments(self,):
+        """test comments are written from cfg_comments and not kept in config """
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        for sec in config.sections():
+            self.assertFalse([k for k in config[sec] if k[:1] in cfg.sys_comment_prefixes])
+
+        text = cfg.cp.render_cfg(config)
+        self.assertIn("[DATA]\n# sec comment 1\n# sec comment 2\nm1 = textm1\n# m2 comment 1\n", text)
+
+        # a comment may contain the delimiters
+        comments = dict(cfg.cfg_comments, var2=['var2 = count: of items'])
+        cp = type(cfg.cp)(cfg.cfg_values, comments)
+        text = cp.render_cfg(config)
+        self.assertIn("# var2 = count: of items\nvar2 = ", text)
+        config = cp.new_config()
+        config.read_string(text)
+        self.assertEqual(config.options('MAIN'), ['var1', 'var2', 'var3'])
+
+        # restore the default cp
+        cfg.run_init()
+        cfg.run()
+
+    def test_default_section(self,):
+        """test the DEFAULT section is kept when the cfg file is rewritten """
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        config.set('DEFAULT', 'shared', 'x')
+        config.set('SYSTEM', 'sys_cfg_version', 'old')
+        cfg.cp.write_cfg(config)
+        try:
+            # the old version rewrites the file
+            cfg.run_init()
+            cfg.run()
+            with open(f"{cfg.datadir}{cfg.cfg_flnm}", 'r') as f:
+                text = f.read()
+            self.assertTrue(text.startswith("[DEFAULT]\nshared = x\n\n"))
+            self.assertEqual(text.count("shared"), 1)
+            self.assertEqual(cfg.config.get('MAIN', 'shared'), 'x')
+            self.assertEqual(cfg.config.get('SYSTEM', 'sys_cfg_version'), cfg.sys_cfg_version)
+        finally:
+            cfg.config.remove_option('DEFAULT', 'shared')
+            cfg.cp.write_cfg(cfg.config)
+            cfg.run_init()
+            cfg.run()
+
     def test_print_config_vars(self,):
         """test print of config vars """
         # load the default values
@@ -123,6 +190,1078 @@ class TestConfig(unittest.TestCase):
         # print without comments
         cfg.cu.print_config_vars(heading='test of print::no comments', comments=False)
 
+    def test_compile_plan(self,):
+        """test the coercion plan is built once per cfg_values """
+        cp = type(cfg.cp)({sec: list(vars) for sec, vars in cfg.cfg_values.items()}, cfg.cfg_comments)
+        plan = cp.plan()
+        self.assertIs(plan, cp.plan())
+        self.assertNotIn('sys_cfg_version', [v[0] for sec in plan for v in sec[2]])
+
+        # the schema key is computed once for the plan
+        key = cp.schema_key()
+        self.assertIs(cp.schema_key(), key)
+
+        # an added variable compiles the plan again
+        cp.cfg_values['MAIN'].append(('var4', 'i'))
+        self.assertIn('var4', [v[0] for sec in cp.plan() for v in sec[2]])
+        self.assertEqual(cp.compiled()[3]['var4'][:2], ('MAIN', 'i'))
+        self.assertNotEqual(cp.schema_key(), key)
+
+        # as does a new cfg_values
+        cp.cfg_values = dict(cp.cfg_values, MAIN=[('var1', 'b'), ('var4', 's')])
+        self.assertEqual(cp.compiled()[3]['var4'][:2], ('MAIN', 's'))
+
+        # values are converted with the type from cfg_values
+        config = cfg.cp.read_config_file(cfg.config)
+        config.set('MAIN', 'var2', '7')
+        config.set('MAIN', 'var1', 'off')
+        cfg.cp.set_config_module_variables(config)
+        self.assertEqual(cfg.var2, 7)
+        self.assertIs(cfg.var1, False)
+        self.assertEqual(cfg.cp.typed_values['MAIN']['var2'], 7)
+
+        config.set('MAIN', 'var1', 'maybe')
+        with self.assertRaises(ValueError):
+            cfg.cp.set_config_module_variables(config)
+
+        # restore the values from the file
+        config = cfg.cp.read_config_file(cfg.config)
+        cfg.cp.set_config_module_variables(config)
+
+    def test_lazy_load(self,):
+        """test sections are set in the cfg module on first access """
+        cfg.lazy_load = True
+        try:
+            cfg.run_init()
+            self.assertNotIn('var2', vars(cfg))
+            self.assertNotIn('m1', vars(cfg))
+
+            # first access sets the whole section
+            self.assertEqual(cfg.var2, 2)
+            self.assertIn('var3', vars(cfg))
+            self.assertNotIn('m1', vars(cfg))
+            self.assertEqual(cfg.m2, ['m2-1', 'm2-2', 'm2-3'])
+
+            # run after run_init does not start a second prefetch or take
+            # the loaded values as defaults
+            prefetch, defaults = cfg.cp.lazy_thread, cfg.cp.lazy_defaults
+            cfg.run()
+            self.assertIs(cfg.cp.lazy_thread, prefetch)
+            self.assertIs(cfg.cp.lazy_defaults, defaults)
+            self.assertIn('var2', vars(cfg))
+            self.assertEqual(cfg.var2, 2)
+
+            with self.assertRaises(AttributeError):
+                cfg.not_a_var
+
+            # load the rest before switching back
+            for sec, vs in cfg.cfg_values.items():
+                for v in vs:
+                    getattr(cfg, v[0])
+        finally:
+            cfg.lazy_load = False
+            cfg.run_init()
+
+    def test_lazy_load_validation(self,):
+        """test a section set on first access is checked against cfg_constraints """
+        from app_config.validation import ConfigValidationError
+
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        config.set('MAIN', 'var2', '99')
+        cfg.cp.write_cfg(config)
+        cfg.cfg_constraints = {'var2': {'max': 5}}
+        cfg.lazy_load = True
+        try:
+            cfg.run_init()
+            with self.assertRaises(ConfigValidationError):
+                cfg.var2
+            self.assertNotIn('var3', vars(cfg))
+            # the other sections are still set
+            self.assertEqual(cfg.m2, ['m2-1', 'm2-2', 'm2-3'])
+            for sec, vs in cfg.cfg_values.items():
+                if sec != 'MAIN':
+                    for v in vs:
+                        getattr(cfg, v[0])
+        finally:
+            cfg.cfg_constraints = {}
+            cfg.lazy_load = False
+            config.set('MAIN', 'var2', '2')
+            cfg.cp.write_cfg(config)
+            cfg.run_init()
+            cfg.run()
+
+    def test_lazy_load_version(self,):
+        """test a variable read while the prefetch rewrites an old version """
+        class SlowRead(type(cfg.cp)):
+            def read_lines(self, config, lines, source):
+                threading.Event().wait(0.2)
+                super().read_lines(config, lines, source)
+
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        config.set('SYSTEM', 'sys_cfg_version', 'old')
+        cfg.cp.write_cfg(config)
+        cfg.lazy_load = True
+        try:
+            cfg.cp = SlowRead(cfg.cfg_values, cfg.cfg_comments)
+            cfg.cp.run_lazy(prefetch=True)
+            values = []
+            reader = threading.Thread(target=lambda: values.append(cfg.var2), daemon=True)
+            reader.start()
+            reader.join(5)
+            self.assertFalse(reader.is_alive())
+            self.assertEqual(values, [2])
+            self.assertEqual(cfg.cp.read_config_file(cfg.cp.new_config()).get('SYSTEM', 'sys_cfg_version'),
+                             cfg.sys_cfg_version)
+        finally:
+            cfg.lazy_load = False
+            cfg.run_init()
+            cfg.run()
+
+    def test_reload(self,):
+        """test reload sets only the changed variables """
+        cfg.cp.set_config_module_variables(cfg.cp.read_config_file(cfg.config))
+        # change the file from a separate config object
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        config.set('MAIN', 'var2', '5')
+        cfg.cp.write_cfg(config)
+
+        cfg.var3 = 'not reloaded'
+        changed = cfg.cp.reload()
+        self.assertEqual(changed, [('MAIN', 'var2')])
+        self.assertEqual(cfg.var2, 5)
+        self.assertEqual(cfg.var3, 'not reloaded')
+
+        # nothing changed
+        self.assertEqual(cfg.cp.reload(), [])
+
+        # restore the default values
+        config.set('MAIN', 'var2', '2')
+        cfg.cp.write_cfg(config)
+        cfg.cp.reload()
+        cfg.var3 = 3.4
+
+    def test_reload_truncated(self,):
+        """test a reload of a truncated file keeps the file and the values """
+        flnm = f"{cfg.datadir}{cfg.cfg_flnm}"
+        with open(flnm) as f:
+            text = f.read()
+        calls = []
+        cfg.cp.subscribe(calls.append)
+        try:
+            for content in ("", "[MAIN]\nvar2 = 7\n"):
+                with open(flnm, 'w') as f:
+                    f.write(content)
+                with self.assertRaises(ValueError):
+                    cfg.cp.reload()
+                with open(flnm) as f:
+                    self.assertEqual(f.read(), content)
+                self.assertEqual(cfg.var2, 2)
+            os.remove(flnm)
+            with self.assertRaises(ValueError):
+                cfg.cp.reload()
+            self.assertFalse(os.path.exists(flnm))
+            self.assertEqual(calls, [])
+        finally:
+            cfg.cp.unsubscribe(calls.append)
+            with open(flnm, 'w') as f:
+                f.write(text)
+            cfg.run_init()
+            cfg.run()
+
+    def test_watch(self,):
+        """test watch reloads the changed file """
+        event = threading.Event()
+        changes = []
+        def on_change(changed):
+            changes.extend(changed)
+            event.set()
+
+        cfg.cp.set_config_module_variables(cfg.cp.read_config_file(cfg.config))
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        cfg.cp.watch(interval=0.05, callback=on_change)
+        try:
+            config.set('DATA', 'm1', 'watched')
+            cfg.cp.write_cfg(config)
+            self.assertTrue(event.wait(5))
+        finally:
+            cfg.cp.unwatch()
+
+        self.assertIn(('DATA', 'm1'), changes)
+        self.assertEqual(cfg.m1, 'watched')
+
+        # restore the default value
+        config.set('DATA', 'm1', 'textm1')
+        cfg.cp.write_cfg(config)
+        cfg.cp.reload()
+
+    def test_fast_reader(self,):
+        """test the fast reader loads the same config as ConfigParser """
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        expected = {s: dict(config.items(s)) for s in config.sections()}
+
+        cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, fast_reader=True)
+        config = cp.read_config_file(cfg.config)
+        self.assertEqual({s: dict(config.items(s)) for s in config.sections()}, expected)
+        cp.set_config_module_variables(config)
+        self.assertEqual(cfg.sys_comment_prefixes, ['#', ';'])
+
+        # restore the default cp
+        cfg.run_init()
+
+    def test_partial_load(self,):
+        """test only the cfg_values sections are read and the others are kept on write """
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        config.add_section('OTHER')
+        config.set('OTHER', 'x', '1')
+        cfg.cp.write_cfg(config)
+
+        cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, partial_load=True)
+        config = cp.read_config_file(cp.new_config())
+        self.assertTrue(os.path.exists(cp.index_flnm()))
+        self.assertFalse(config.has_section('OTHER'))
+        self.assertEqual(config.get('DATA', 'm1'), 'textm1')
+
+        config.set('DATA', 'm1', 'partial')
+        cp.write_cfg(config)
+        full = cfg.cp.read_config_file(cfg.cp.new_config())
+        self.assertEqual(full.get('OTHER', 'x'), '1')
+        self.assertEqual(full.get('DATA', 'm1'), 'partial')
+
+        # a cache saved by a partial load is not used by a full load
+        type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, partial_load=True, cache=True).run()
+        cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, cache=True)
+        self.assertFalse(cp.load_cache(cp.new_config()))
+        cp.run()
+        cp.write_cfg(cfg.config)
+        full = cfg.cp.read_config_file(cfg.cp.new_config())
+        self.assertEqual(full.get('OTHER', 'x'), '1')
+
+        # restore the default file
+        full.remove_section('OTHER')
+        full.set('DATA', 'm1', 'textm1')
+        cfg.cp.write_cfg(full)
+        cfg.run_init()
+
+    def test_layers(self,):
+        """test overlays and conf.d files override the cfg file """
+        confd = os.path.join(cfg.datadir, 'conf.d')
+        os.makedirs(confd, exist_ok=True)
+        with open(os.path.join(cfg.datadir, 'overlay.cfg'), 'w') as f:
+            f.write("[DEFAULT]\nshared = overlay\n[MAIN]\nvar2 = 9\nvar3 = 1.5\n")
+        with open(os.path.join(confd, '10-data.cfg'), 'w') as f:
+            f.write("[DEFAULT]\nshared = confd\n[MAIN]\nvar3 = 2.5\n[DATA]\n# confd comment\nm1 = confd\n")
+
+        cfg.cfg_overlays = ['overlay.cfg', 'missing.cfg']
+        cfg.cfg_confd = 'conf.d'
+        try:
+            cfg.run()
+            self.assertEqual(cfg.var2, 9)
+            self.assertEqual(cfg.var3, 2.5)
+            self.assertEqual(cfg.m1, 'confd')
+
+            # a layer's DEFAULT is merged into DEFAULT, a later DEFAULT
+            # overrides it in every section
+            self.assertEqual(cfg.config.defaults()['shared'], 'confd')
+            self.assertEqual(cfg.config.get('MAIN', 'shared'), 'confd')
+            self.assertNotIn('shared', cfg.config._sections['MAIN'])
+
+            # the layered values are not written to the cfg file
+            cfg.config.set('MAIN', 'var1', 'False')
+            cfg.cp.write_cfg(cfg.config)
+            base = cfg.cp.new_config()
+            base.read(f"{cfg.datadir}{cfg.cfg_flnm}")
+            self.assertEqual(base.get('MAIN', 'var2'), '2')
+            self.assertEqual(base.get('DATA', 'm1'), 'textm1')
+            self.assertEqual(base.get('MAIN', 'var1'), 'False')
+            self.assertNotIn('shared', base.defaults())
+            self.assertFalse(base.has_option('MAIN', 'shared'))
+        finally:
+            cfg.cfg_overlays = []
+            cfg.cfg_confd = None
+            shutil.rmtree(confd)
+            os.remove(os.path.join(cfg.datadir, 'overlay.cfg'))
+
+        cfg.config.set('MAIN', 'var1', 'True')
+        cfg.cp.write_cfg(cfg.config)
+        cfg.run_init()
+        cfg.run()
+
+    def test_arun(self,):
+        """test the asyncio run, reload and watch """
+        async def main():
+            await cfg.arun()
+            self.assertEqual(cfg.m1, 'textm1')
+
+            config = cfg.cp.read_config_file(cfg.cp.new_config())
+            config.set('DATA', 'm1', 'async')
+            cfg.cp.write_cfg(config)
+            self.assertEqual(await cfg.cp.areload(), [('DATA', 'm1')])
+            self.assertEqual(cfg.m1, 'async')
+
+            event = asyncio.Event()
+            async def on_change(changed):
+                event.set()
+
+            task = asyncio.create_task(cfg.cp.awatch(interval=0.05, callback=on_change))
+            # let the task take the file stamp
+            await asyncio.sleep(0.2)
+            config.set('DATA', 'm1', 'textm1')
+            cfg.cp.write_cfg(config)
+            await asyncio.wait_for(event.wait(), 5)
+            task.cancel()
+            self.assertEqual(cfg.m1, 'textm1')
+
+            # the cache is written once, off the event loop thread
+            cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, cache=True)
+            await cp.arun()
+            saves = []
+            save_cache = cp.save_cache
+            cp.save_cache = lambda config: (saves.append(threading.get_ident()), save_cache(config))
+            config.set('DATA', 'm1', 'cached')
+            cfg.cp.write_cfg(config)
+            self.assertEqual(await cp.areload(), [('DATA', 'm1')])
+            self.assertEqual(len(saves), 1)
+            self.assertNotEqual(saves[0], threading.get_ident())
+            config.set('DATA', 'm1', 'textm1')
+            cfg.cp.write_cfg(config)
+
+        asyncio.run(main())
+        cfg.run_init()
+        cfg.run()
+
+    def test_snapshot(self,):
+        """test a new snapshot is published and the old one is unchanged """
+        cfg.run()
+        snap = cfg.snapshot
+        self.assertEqual(snap.var2, 2)
+        self.assertEqual(snap['m2'], ('m2-1', 'm2-2', 'm2-3'))
+        self.assertEqual(snap.section('MAIN')['var3'], 3.4)
+        with self.assertRaises(AttributeError):
+            snap.var2 = 3
+
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        config.set('MAIN', 'var2', '6')
+        cfg.cp.write_cfg(config)
+        cfg.cp.reload()
+        self.assertEqual(cfg.snapshot.var2, 6)
+        self.assertEqual(cfg.snapshot.generation, snap.generation + 1)
+        self.assertEqual(snap.var2, 2)
+
+        config.set('MAIN', 'var2', '2')
+        cfg.cp.write_cfg(config)
+        cfg.cp.reload()
+
+        # an array changed in the cfg module is not changed in the snapshot
+        from app_config.configparms import converters
+        from app_config.snapshot import ConfigSnapshot
+        cfg.arr = converters['ai']('1,2,3')
+        snap = ConfigSnapshot({'ARR': {'arr': cfg.arr}})
+        cfg.arr[0] = 9
+        self.assertEqual(list(snap.arr), [1, 2, 3])
+        if hasattr(snap.arr, 'flags'):
+            self.assertFalse(snap.arr.flags.writeable)
+        del cfg.arr
+
+    def test_shared_memory(self,):
+        """test workers attach to the shared values and see new generations """
+        cfg.run()
+        name = cfg.cp.share()
+        try:
+            # a worker sets the cfg module from shared memory
+            cfg.var2 = None
+            worker = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments)
+            configs = []
+            worker.set_custom_module_vars = configs.append
+            worker.attach(name)
+            self.assertEqual(cfg.var2, 2)
+            # set_custom_module_vars is passed None, the worker has no config
+            self.assertEqual(configs, [None])
+            self.assertFalse(worker.check_shared())
+
+            # a reload in the parent writes a new generation
+            config = cfg.cp.read_config_file(cfg.cp.new_config())
+            config.set('MAIN', 'var2', '8')
+            cfg.cp.write_cfg(config)
+            cfg.cp.reload()
+            cfg.var2 = None
+            self.assertTrue(worker.check_shared())
+            self.assertEqual(cfg.var2, 8)
+            self.assertEqual(cfg.snapshot.var2, 8)
+
+            # values that outgrow the segment are moved to a larger one
+            generation = cfg.snapshot.generation
+            config.set('DATA', 'm1', 'x' * 100000)
+            cfg.cp.write_cfg(config)
+            cfg.cp.reload()
+            self.assertNotEqual(cfg.cp.shared.name, name)
+            cfg.m1 = None
+            self.assertTrue(worker.check_shared())
+            self.assertEqual(worker.shared.name, cfg.cp.shared.name)
+            self.assertEqual(len(cfg.m1), 100000)
+            self.assertEqual(cfg.snapshot.generation, generation + 1)
+            self.assertFalse(worker.check_shared())
+            worker.unshare()
+
+            # a worker process that attaches and exits leaves the segment
+            code = ("import sys\n"
+                    "from app_config.sharedmem import attach_segment\n"
+                    "attach_segment(sys.argv[1]).close()\n")
+            env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+            proc = subprocess.run([sys.executable, '-c', code, cfg.cp.shared.name], env=env,
+                                  capture_output=True, text=True)
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+            self.assertNotIn('leaked', proc.stderr)
+            from app_config.sharedmem import SharedValues
+            SharedValues(cfg.cp.shared.name).close()
+        finally:
+            cfg.cp.unshare()
+
+        config.set('MAIN', 'var2', '2')
+        config.set('DATA', 'm1', 'textm1')
+        cfg.cp.write_cfg(config)
+        cfg.run_init()
+        cfg.run()
+
+    def test_cache(self,):
+        """test the cfg file cache is used until the file changes """
+        cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, cache=True)
+        cp.run()
+        self.assertTrue(os.path.exists(cp.cache_flnm()))
+
+        # unchanged file loads from the cache
+        cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, cache=True)
+        self.assertTrue(cp.load_cache(cfg.config))
+        cp.set_config_module_variables(cfg.config)
+        self.assertEqual(cfg.m2, ['m2-1', 'm2-2', 'm2-3'])
+
+        # the cache is not a pickle, a damaged or shared cache is not used
+        with open(cp.cache_flnm(), 'rb') as f:
+            blob = f.read()
+        self.assertTrue(blob.startswith(b'ACFG'))
+        if hasattr(os, 'getuid'):
+            os.chmod(cp.cache_flnm(), 0o666)
+            self.assertFalse(cp.load_cache(cfg.config))
+            os.chmod(cp.cache_flnm(), 0o644)
+        with open(cp.cache_flnm(), 'wb') as f:
+            f.write(blob[:-1] + bytes([blob[-1] ^ 1]))
+        self.assertFalse(cp.load_cache(cfg.config))
+        with open(cp.cache_flnm(), 'wb') as f:
+            f.write(blob)
+        self.assertTrue(cp.load_cache(cfg.config))
+
+        # a change to the file invalidates the cache
+        with open(f"{cfg.datadir}{cfg.cfg_flnm}", 'a') as f:
+            f.write("\n")
+        self.assertFalse(cp.load_cache(cfg.config))
+
+        # restore the default cp
+        cfg.run_init()
+
+    def test_stats(self,):
+        """test the phase and hook times and the tracer """
+        spans = []
+        cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments,
+                          tracer=lambda name, start, end, ok: spans.append((name, end >= start, ok)))
+        cp.run()
+
+        for name in ('run', 'read', 'verify', 'convert', 'publish'):
+            self.assertEqual(cp.stats.phases[name]['calls'], 1)
+        self.assertEqual(spans[-1], ('run', True, True))
+
+        # one set_module_vars call per variable, the version is not set
+        nvars = sum(len(vars) for vars in cfg.cfg_values.values()) - 1
+        self.assertEqual(cp.stats.hooks['set_module_vars']['calls'], nvars)
+        self.assertEqual(cp.stats.hooks['set_module_sects']['calls'], len(cfg.cfg_values))
+        # the ext module overrides the hooks
+        self.assertIn('custom_init_routine', cp.stats.overrides)
+        self.assertIn('set_module_vars', cp.stats.report())
+
+        cp.stats.reset()
+        cp.reload()
+        self.assertEqual(list(cp.stats.phases)[-1], 'reload')
+
+        # no stats by default
+        self.assertIsNone(cfg.cp.stats)
+
+        # restore the default cp
+        cfg.run_init()
+
+    def test_arrays(self,):
+        """test the integer and float array types """
+        from array import array
+        from app_config import configparms
+
+        cfg_values = dict(cfg.cfg_values, ARRAYS=[('arr_i', 'ai'), ('arr_f', 'af')])
+        cfg.arr_i = [1, 2, 3]
+        cfg.arr_f = [0.5, 1.5]
+        cp = type(cfg.cp)(cfg_values, cfg.cfg_comments)
+
+        # the defaults are written as comma separated numbers
+        config = cp.set_default_config(cfg.config)
+        self.assertEqual(config.get('ARRAYS', 'arr_i'), '1,2,3')
+        self.assertEqual(config.get('ARRAYS', 'arr_f'), '0.5,1.5')
+
+        config.set('ARRAYS', 'arr_f', ' 0.25, 2.5,\n3')
+        cp.set_config_module_variables(config)
+        self.assertEqual(list(cfg.arr_i), [1, 2, 3])
+        self.assertEqual(list(cfg.arr_f), [0.25, 2.5, 3.0])
+        if configparms._numpy() is None:
+            self.assertEqual(cfg.arr_f, array('d', [0.25, 2.5, 3.0]))
+        self.assertEqual(configparms.format_value('af', cfg.arr_f), '0.25,2.5,3.0')
+        self.assertEqual(len(configparms.converters['ai']('')), 0)
+
+        config.set('ARRAYS', 'arr_i', '1,x')
+        with self.assertRaises(ValueError):
+            cp.set_config_module_variables(config)
+
+        # restore the default cp
+        del cfg.arr_i, cfg.arr_f
+        cfg.run_init()
+        cfg.run()
+
+    def test_sets(self,):
+        """test the frozenset type and multi line lists """
+        import io
+        from app_config import configparms
+
+        cfg_values = dict(cfg.cfg_values, SETS=[('allow', 'fs'), ('names', 'l')])
+        cfg.allow = {'id2', 'id1'}
+        cfg.names = ['n1', 'n2']
+        cp = type(cfg.cp)(cfg_values, cfg.cfg_comments)
+
+        # a set is written one item per line and read back
+        config = cp.set_default_config(cfg.config)
+        self.assertEqual(config.get('SETS', 'allow'), 'id1\nid2')
+        buf = io.StringIO()
+        config.write(buf)
+        config = cp.new_config()
+        config.read_string(buf.getvalue())
+        config.set('SETS', 'names', 'n1, n2\nn3\n\nn4,')
+        cp.set_config_module_variables(config)
+        self.assertEqual(cfg.allow, frozenset({'id1', 'id2'}))
+        self.assertEqual(cfg.names, ['n1', 'n2', 'n3', 'n4'])
+
+        # the items are interned
+        item = ''.join(['id', '1'])
+        self.assertIs(sys.intern(item), [x for x in cfg.allow if x == item][0])
+        self.assertEqual(configparms.converters['fs']('a, b,\n c'), frozenset({'a', 'b', 'c'}))
+
+        # restore the default cp
+        del cfg.allow, cfg.names
+        cfg.run_init()
+        cfg.run()
+
+    def test_validation(self,):
+        """test cfg_constraints are checked and all the errors are reported """
+        from app_config.validation import ConfigValidationError
+
+        cfg.cfg_constraints = {'var2': {'min': 0, 'max': 5},
+                               'm1': {'regex': r'text\w+'},
+                               'm2': {'choices': ['m2-1', 'm2-2', 'm2-3']},
+                               ('var2', 'var3'): {'check': lambda v2, v3: v2 < v3,
+                                                  'message': 'var2 must be less than var3'},
+                               }
+        try:
+            config = cfg.cp.read_config_file(cfg.cp.new_config())
+            cfg.cp.set_config_module_variables(config)
+            self.assertEqual(cfg.var2, 2)
+
+            config.set('MAIN', 'var2', '9')
+            config.set('DATA', 'm2', 'm2-1,bad')
+            with self.assertRaises(ConfigValidationError) as cm:
+                cfg.cp.set_config_module_variables(config)
+            self.assertEqual(cm.exception.errors,
+                             ["MAIN.var2: 9 is greater than the max 5",
+                              "DATA.m2: 'bad' is not one of [\"'m2-1'\", \"'m2-2'\", \"'m2-3'\"]",
+                              "MAIN.var2, MAIN.var3: var2 must be less than var3"])
+            # the invalid values are not set
+            self.assertEqual(cfg.var2, 2)
+            self.assertEqual(cfg.m2, ['m2-1', 'm2-2', 'm2-3'])
+
+            # a reload with invalid values keeps the old values
+            with self.assertRaises(ConfigValidationError):
+                cfg.cp.apply_reload(config)
+            self.assertEqual(cfg.var2, 2)
+        finally:
+            cfg.cfg_constraints = {}
+            cfg.run_init()
+            cfg.run()
+
+    def test_sections(self,):
+        """test the section objects """
+        cfg_values = dict(cfg.cfg_values, OTHER=[('m1', 's')])
+        cp = type(cfg.cp)(cfg_values, cfg.cfg_comments, sections=True)
+        config = cp.read_config_file(cfg.config)
+        config.set('OTHER', 'm1', 'other')
+        cp.set_config_module_variables(config)
+        try:
+            # each section keeps its own m1
+            self.assertEqual(cfg.DATA.m1, 'textm1')
+            self.assertEqual(cfg.OTHER.m1, 'other')
+            self.assertEqual(cfg.MAIN.var2, 2)
+            self.assertEqual(cfg.DATA.m2, ['m2-1', 'm2-2', 'm2-3'])
+            self.assertEqual(cfg.SYSTEM.sys_cfg_version, cfg.sys_cfg_version)
+            self.assertEqual(list(cfg.MAIN), ['var1', 'var2', 'var3'])
+            self.assertFalse(hasattr(cfg.MAIN, '__dict__'))
+            with self.assertRaises(AttributeError):
+                cfg.MAIN.var2 = 3
+
+            # a reload sets a new object for the changed section
+            main = cfg.MAIN
+            config = cp.read_config_file(cp.new_config())
+            config.set('MAIN', 'var2', '5')
+            cp.apply_reload(config)
+            self.assertEqual(cfg.MAIN.var2, 5)
+            self.assertEqual(main.var2, 2)
+        finally:
+            # restore the default cp
+            for sec in cfg_values:
+                delattr(cfg, sec)
+            cfg.m1 = 'textm1'
+            cfg.run_init()
+            cfg.run()
+
+    def test_backends(self,):
+        """test the json and toml cfg files keep the value types """
+        import json
+        flnm = cfg.cfg_flnm
+        formats = ['json']
+        try:
+            import tomllib
+            formats.append('toml')
+        except ImportError:
+            pass
+
+        try:
+            for fmt in formats:
+                cfg.cfg_flnm = f"test_config.{fmt}"
+                # the defaults are written to the new file
+                cfg.var1, cfg.var2, cfg.var3 = True, 2, 3.4
+                cfg.m1 = 'say "hi"\\'
+                cfg.m2 = ['m2-1', 'm2-2', 'm2-3']
+                cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments)
+                cp.run()
+                with open(f"{cfg.datadir}{cfg.cfg_flnm}", 'r') as f:
+                    text = f.read()
+                data = json.loads(text) if fmt == 'json' else tomllib.loads(text)
+                self.assertEqual(data['MAIN'], {'var1': True, 'var2': 2, 'var3': 3.4})
+                self.assertEqual(data['DATA']['m2'], ['m2-1', 'm2-2', 'm2-3'])
+                self.assertEqual(data['DATA']['m1'], 'say "hi"\\')
+                if fmt == 'toml':
+                    self.assertIn("# m2 comment 2\nm2 = [", text)
+
+                # the typed values are set without a string conversion
+                data['MAIN']['var2'] = 7
+                data['DATA']['m2'] = ['a', 'b']
+                with open(f"{cfg.datadir}{cfg.cfg_flnm}", 'w') as f:
+                    if fmt == 'json':
+                        json.dump(data, f)
+                    else:
+                        f.write("[MAIN]\nvar1 = false\nvar2 = 7\nvar3 = 1\n[DATA]\nm1 = 'x'\nm2 = ['a', 'b']\n"
+                                f"[SYSTEM]\nsys_cfg_version = '{cfg.sys_cfg_version}'\n")
+                cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments)
+                cp.run()
+                self.assertEqual(cfg.var2, 7)
+                self.assertEqual(cfg.m2, ['a', 'b'])
+                self.assertIsInstance(cfg.var3, float)
+                self.assertIsInstance(cfg.config.get('MAIN', 'var2'), int)
+        finally:
+            cfg.cfg_flnm = flnm
+            cfg.var1, cfg.var2, cfg.var3 = True, 2, 3.4
+            cfg.m1 = 'textm1'
+            cfg.m2 = ['m2-1', 'm2-2', 'm2-3']
+            cfg.run_init()
+            cfg.run()
+
+    def test_native_types(self,):
+        """test a typed value of a json or toml file must be of the cfg_values type """
+        import json
+        from app_config.configparms import convert_value, converters
+
+        good = {'b': [True], 'i': [2], 'f': [2, 2.5], 's': ['x'], 'l': [['a', 'b']],
+                'ai': [[1, 2]], 'af': [[1, 2.5]], 'fs': [['a', 1]]}
+        bad = {'b': [1, 0.0], 'i': [2.9, True, [2]], 'f': [True, [1.5]], 's': [5, True, ['x']],
+               'l': [('a',), ['a', 1]], 'ai': [[1, 2.5], [True], 3], 'af': [[1, 'x'], 1.5],
+               'fs': [{'a': 1}, 5]}
+        for var_type, values in good.items():
+            for value in values:
+                convert_value(value, var_type, converters[var_type])
+        for var_type, values in bad.items():
+            for value in values:
+                with self.assertRaises(ValueError, msg=f"{var_type} {value!r}"):
+                    convert_value(value, var_type, converters[var_type])
+        self.assertIsInstance(convert_value(2, 'f', float), float)
+
+        flnm = cfg.cfg_flnm
+        cfg.cfg_flnm = "test_native.json"
+        path = f"{cfg.datadir}{cfg.cfg_flnm}"
+        try:
+            data = {'DEFAULT': {'shared': ['a', 'b']},
+                    'MAIN': {'var1': True, 'var2': 2, 'var3': 3.4},
+                    'DATA': {'m1': 'textm1', 'm2': ['m2-1']},
+                    'SYSTEM': {'sys_cfg_version': cfg.sys_cfg_version}}
+            with open(path, 'w') as f:
+                json.dump(data, f)
+            cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments)
+            cp.run()
+            # the DEFAULT values keep their types
+            self.assertEqual(cfg.config.defaults()['shared'], ['a', 'b'])
+            self.assertEqual(cfg.config.get('MAIN', 'shared'), ['a', 'b'])
+
+            data['MAIN']['var2'] = 2.9
+            with open(path, 'w') as f:
+                json.dump(data, f)
+            with self.assertRaises(ValueError) as cm:
+                type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments).run()
+            self.assertIn("MAIN.var2: 2.9 is not an int", str(cm.exception))
+            self.assertEqual(cfg.var2, 2)
+        finally:
+            os.remove(path)
+            cfg.cfg_flnm = flnm
+            cfg.run_init()
+            cfg.run()
+
+    def test_artifact(self,):
+        """test the compiled artifact is loaded in place of the cfg file """
+        from app_config.artifact import ArtifactError
+        import app_config
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([os.path.dirname(os.path.dirname(app_config.__file__)),
+                                             env.get('PYTHONPATH', '')])
+        tests_dir = os.path.dirname(os.path.abspath(__file__))
+        proc = subprocess.run([sys.executable, '-m', 'app_config.compile_config', f"{cfg.datadir}{cfg.cfg_flnm}"], env=env,
+                              cwd=tests_dir, capture_output=True, text=True)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+        flnm = os.path.join(tests_dir, f"{cfg.datadir}{cfg.cfg_flnm}.bin")
+        self.assertTrue(os.path.isfile(flnm))
+
+        try:
+            # the cfg file is not read
+            config = cfg.cp.read_config_file(cfg.cp.new_config())
+            config.set('MAIN', 'var2', '5')
+            cfg.cp.write_cfg(config)
+            cfg.var2 = 0
+            cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, artifact=flnm)
+            cp.run()
+            self.assertEqual(cfg.var2, 2)
+            self.assertEqual(cfg.m2, ['m2-1', 'm2-2', 'm2-3'])
+            self.assertEqual(cfg.config.get('DATA', 'm1'), 'textm1')
+
+            # the artifact must match the cfg module
+            cp = type(cfg.cp)({**cfg.cfg_values, 'NEW': [('new_var', 's')]}, cfg.cfg_comments, artifact=flnm)
+            with self.assertRaisesRegex(ArtifactError, 'other cfg_values'):
+                cp.run()
+            with open(flnm, 'r+b') as f:
+                f.seek(-1, os.SEEK_END)
+                f.write(b'\0')
+            cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, artifact=flnm)
+            with self.assertRaisesRegex(ArtifactError, 'damaged'):
+                cp.run()
+        finally:
+            os.remove(flnm)
+            config.set('MAIN', 'var2', '2')
+            cfg.cp.write_cfg(config)
+            cfg.run_init()
+            cfg.run()
+
+    def test_check_files(self,):
+        """test many cfg files are checked and upgraded in worker processes """
+        from app_config.check_config import check_files
+        tests_dir = os.path.dirname(os.path.abspath(__file__))
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        text = cfg.cp.render_cfg(config)
+        files = {'fleet_ok.cfg': text,
+                 'fleet_old.cfg': text.replace(f"sys_cfg_version = {cfg.sys_cfg_version}", "sys_cfg_version = 0.0.0")
+                                      .replace("var3 = 3.4\n", "old_var = 1\n"),
+                 'fleet_bad.cfg': text.replace("var2 = 2\n", "var2 = two\n"),
+                 }
+        flnms = [os.path.join(tests_dir, f"{cfg.datadir}{f}") for f in files]
+        for flnm, text in zip(flnms, files.values()):
+            with open(flnm, 'w') as f:
+                f.write(text)
+
+        cfg_config = cfg.config
+        cfg.var2 = 'not changed'
+        try:
+            results = list(check_files(flnms, upgrade=True, jobs=2, app_dir=tests_dir))
+            self.assertEqual([r['status'] for r in results], ['ok', 'upgraded', 'error'])
+            self.assertIn('MAIN.var3 added', results[1]['changes'])
+            self.assertIn('MAIN.old_var removed', results[1]['changes'])
+            self.assertIn('MAIN.var2', results[2]['errors'][0])
+            self.assertTrue(all(r['seconds'] > 0 for r in results))
+
+            # the upgraded file has the current version and options
+            with open(flnms[1]) as f:
+                self.assertEqual(f.read(), files['fleet_ok.cfg'])
+            self.assertEqual([r['status'] for r in check_files(flnms[:2], jobs=1, app_dir=tests_dir)], ['ok', 'ok'])
+
+            # the cfg module is not changed
+            self.assertIs(cfg.config, cfg_config)
+            self.assertEqual(cfg.var2, 'not changed')
+        finally:
+            for flnm in flnms:
+                os.remove(flnm)
+            cfg.var2 = 2
+
+    def test_check_files_hooks(self,):
+        """test an upgrade leaves the sections and variables of the hooks alone """
+        from app_config.check_config import check_files
+        tests_dir = os.path.dirname(os.path.abspath(__file__))
+
+        class Hooks(type(cfg.cp)):
+            labels = []
+
+            def set_custom_default_sects(self, config, sec, vars):
+                if sec == 'GROUP_LABELS':
+                    config.set(sec, 'sess0', 'red,white,blue')
+                    return True
+                return False
+
+            def verify_config_sects(self, config, sec, vars):
+                return sec == 'GROUP_LABELS'
+
+            def set_module_sects(self, config, sec, vars):
+                if sec == 'GROUP_LABELS':
+                    self.labels.extend(v.split(',') for v in config[sec].values())
+                    return True
+                return False
+
+            def set_module_vars(self, config, sec, vars, var):
+                # var2 is set by the hook, it may be a float in the file
+                return var == 'var2'
+
+        config = cfg.cp.read_config_file(cfg.cp.new_config())
+        text = (cfg.cp.render_cfg(config)
+                .replace(f"sys_cfg_version = {cfg.sys_cfg_version}", "sys_cfg_version = 0.0.0")
+                .replace("var2 = 2\n", "var2 = 3.14\n")
+                + "[GROUP_LABELS]\nsess0 = a,b\nsess1 = c\n\n")
+        flnm = f"{cfg.datadir}fleet_hooks.cfg"
+        with open(flnm, 'w') as f:
+            f.write(text)
+        cfg.cp = Hooks(dict(cfg.cfg_values, GROUP_LABELS=[]), cfg.cfg_comments)
+        try:
+            result, = check_files([flnm], upgrade=True, jobs=1, app_dir=tests_dir)
+            self.assertEqual(result['errors'], [])
+            self.assertEqual(result['status'], 'upgraded')
+            self.assertEqual(result['changes'], ['sys_cfg_version 0.0.0 -> ' + cfg.sys_cfg_version])
+            self.assertEqual(Hooks.labels, [['a', 'b'], ['c']])
+            with open(flnm) as f:
+                upgraded = f.read()
+            self.assertIn("[GROUP_LABELS]\nsess0 = a,b\nsess1 = c\n", upgraded)
+            self.assertIn("var2 = 3.14\n", upgraded)
+        finally:
+            os.remove(flnm)
+            cfg.run_init()
+            cfg.run()
+
+    def test_interpolation(self,):
+        """test ${SECTION:key} references are resolved once per load """
+        import configparser
+        from app_config.interpolation import InterpolationCycleError
+        cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, interpolation=True)
+        config = cp.read_config_file(cp.new_config())
+        config.add_section('PATHS')
+        config.set('PATHS', 'root', '/srv')
+        config.set('PATHS', 'logs', '${root}/logs')
+        config.set('DATA', 'm1', '${PATHS:logs}/app.log $$5 100%')
+        cp.write_cfg(config)
+        try:
+            cp.run()
+            self.assertEqual(cfg.m1, '/srv/logs/app.log $5 100%')
+            # the resolved value is kept, a set resolves the values again
+            self.assertIs(cfg.config.get('PATHS', 'logs'), cfg.config.get('PATHS', 'logs'))
+            cfg.config.set('PATHS', 'root', '/opt')
+            self.assertEqual(cfg.config.get('DATA', 'm1'), '/opt/logs/app.log $5 100%')
+            # the file keeps the references
+            with open(f"{cfg.datadir}{cfg.cfg_flnm}") as f:
+                self.assertIn("m1 = ${PATHS:logs}/app.log $$5 100%\n", f.read())
+
+            config.set('PATHS', 'missing', '${NONE:key}')
+            with self.assertRaises(configparser.InterpolationMissingOptionError):
+                config.get('PATHS', 'missing')
+
+            # a cycle fails the load
+            config.remove_option('PATHS', 'missing')
+            config.set('PATHS', 'root', '${DATA:m1}')
+            cp.write_cfg(config)
+            cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, interpolation=True)
+            with self.assertRaises(InterpolationCycleError) as e:
+                cp.run()
+            self.assertEqual(e.exception.cycle, [('DATA', 'm1'), ('PATHS', 'logs'), ('PATHS', 'root'),
+                                                 ('DATA', 'm1')])
+        finally:
+            config.remove_section('PATHS')
+            config.set('DATA', 'm1', 'textm1')
+            cp.write_cfg(config)
+            cfg.run_init()
+            cfg.run()
+
+    def test_interpolation_cache(self,):
+        """test the cache of a load without interpolation is not used with it """
+        cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, cache=True)
+        config = cp.read_config_file(cp.new_config())
+        config.add_section('PATHS')
+        config.set('PATHS', 'root', '/srv')
+        config.set('DATA', 'm1', '${PATHS:root}/app.log')
+        cp.write_cfg(config)
+        try:
+            cp.run()
+            self.assertEqual(cfg.m1, '${PATHS:root}/app.log')
+            cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, cache=True, interpolation=True)
+            cp.run()
+            self.assertEqual(cfg.m1, '/srv/app.log')
+            # the cache saved with interpolation is used with it
+            cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, cache=True, interpolation=True)
+            self.assertTrue(cp.load_cache(cp.new_config()))
+        finally:
+            config.remove_section('PATHS')
+            config.set('DATA', 'm1', 'textm1')
+            cp.write_cfg(config)
+            os.remove(cp.cache_flnm())
+            cfg.run_init()
+            cfg.run()
+
+    def test_subscribe(self,):
+        """test subscribers are called once per load with their changed variables """
+        cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments)
+        cp.run()
+        calls = []
+        cp.subscribe(lambda changes: calls.append(('MAIN', changes)), 'MAIN')
+        cp.subscribe(lambda changes: calls.append(('m1', changes)), 'm1')
+        everything = cp.subscribe(lambda changes: calls.append(('all', changes)))
+        with self.assertRaises(ValueError):
+            cp.subscribe(print, 'not_a_var')
+
+        config = cp.read_config_file(cp.new_config())
+        try:
+            config.set('MAIN', 'var2', '5')
+            config.set('MAIN', 'var3', '1.5')
+            cp.write_cfg(config)
+            cp.reload()
+            self.assertEqual(calls, [('MAIN', {'var2': (2, 5), 'var3': (3.4, 1.5)}),
+                                     ('all', {'var2': (2, 5), 'var3': (3.4, 1.5)})])
+
+            # nothing changed, no calls
+            calls.clear()
+            cp.run()
+            self.assertEqual(calls, [])
+
+            cp.unsubscribe(everything)
+            config.set('DATA', 'm1', 'changed')
+            cp.write_cfg(config)
+            cp.run()
+            self.assertEqual(calls, [('m1', {'m1': ('textm1', 'changed')})])
+        finally:
+            config.set('MAIN', 'var2', '2')
+            config.set('MAIN', 'var3', '3.4')
+            config.set('DATA', 'm1', 'textm1')
+            cp.write_cfg(config)
+            cfg.run_init()
+            cfg.run()
+
+    def test_batch_update(self,):
+        """test updates are set at once and written back together later """
+        flnm = f"{cfg.datadir}{cfg.cfg_flnm}"
+        cp = type(cfg.cp)(cfg.cfg_values, cfg.cfg_comments, write_delay=0.05)
+        cp.run()
+        # a line the full write of the file would drop
+        with open(flnm) as f:
+            text = f.read()
+        with open(flnm, 'w') as f:
+            f.write(text.replace("[MAIN]\n", "[MAIN]\n# kept by the patch\n"))
+        try:
+            cp.update({'var2': '7'}, m2=['a', 'b'])
+            cp.update(var3=1.5)
+            self.assertEqual((cfg.var2, cfg.var3, cfg.m2), (7, 1.5, ['a', 'b']))
+            self.assertEqual(cfg.config.get('MAIN', 'var2'), '7')
+            self.assertEqual(cp.dirty, {('MAIN', 'var2'), ('MAIN', 'var3'), ('DATA', 'm2')})
+            with self.assertRaises(ValueError):
+                cp.update(not_a_var=1)
+
+            # one write for the updates
+            cp.write_timer.join()
+            self.assertIsNone(cp.write_timer)
+            self.assertEqual(cp.dirty, set())
+            with open(flnm) as f:
+                patched = f.read()
+            self.assertIn("# kept by the patch\n", patched)
+            self.assertIn("var2 = 7\nvar3 = 1.5\n", patched)
+            self.assertIn("# m2 comment 2\nm2 = a,b\n\n[SYSTEM]", patched)
+            cp.run()
+            self.assertEqual((cfg.var2, cfg.var3, cfg.m2), (7, 1.5, ['a', 'b']))
+
+            # the file is written if an option is not in it
+            cfg.config.remove_option('DATA', 'm1')
+            cp.write_cfg(cfg.config)
+            cp.update(m1='new')
+            self.assertTrue(cp.flush())
+            self.assertFalse(cp.flush())
+            with open(flnm) as f:
+                self.assertIn("m1 = new\n", f.read())
+
+            # the updates go to the cfg file they were made for
+            cp.update(var2=9)
+            cfg.cfg_flnm = 'other_config.cfg'
+            self.assertTrue(cp.flush())
+            self.assertFalse(os.path.exists(f"{cfg.datadir}{cfg.cfg_flnm}"))
+            with open(flnm) as f:
+                self.assertIn("var2 = 9\n", f.read())
+        finally:
+            cfg.cfg_flnm = os.path.basename(flnm)
+            cp.flush()
+            with open(flnm, 'w') as f:
+                f.write(text)
+            cfg.run_init()
+            cfg.run()
+
+    def test_import_time(self,):
+        """test importing src.config does not load the modules only some options use """
+        import app_config
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join([os.path.dirname(os.path.dirname(app_config.__file__)),
+                                             env.get('PYTHONPATH', '')])
+        env['APP_CONFIG_DATADIR'] = f"{os.sep}tmp{os.sep}appdata"
+        # the first import writes the .pyc files the timed import loads
+        env.pop('PYTHONDONTWRITEBYTECODE', None)
+        code = ("import src.config as cfg\n"
+                "from app_config.configparms import resolve_directories\n"
+                "print(resolve_directories(cfg.__file__)[3])\n"
+                "import pathlib\n"
+                "print(isinstance(cfg.wkdir_path, pathlib.Path))\n")
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=env,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        self.assertEqual(proc.returncode, 0, proc.stderr)
+
+        # the data directory is taken from the environment
+        datadir, is_path = proc.stdout.split()
+        self.assertEqual(datadir, f"{os.sep}tmp{os.sep}appdata{os.sep}")
+        # the public wkdir_path is a pathlib.Path
+        self.assertEqual(is_path, 'True')
+
+        def import_times(proc):
+            """ {module: cumulative us} of the python -X importtime output """
+            self.assertEqual(proc.returncode, 0, proc.stderr)
+            modules = {}
+            for line in proc.stderr.splitlines():
+                if line.startswith('import time:') and 'cumulative' not in line:
+                    _, cumulative, name = line.split('|')
+                    modules[name.strip()] = int(cumulative)
+            return modules
+
+        modules = import_times(proc)
+        for name in ('asyncio', 'concurrent.futures', 'inspect', 'pickle', 'hashlib', 'json', 'mmap',
+                     'importlib.util', 'multiprocessing', 'ctypes', 'threading',
+                     'app_config.snapshot', 'app_config.stats'):
+            self.assertNotIn(name, modules)
+
+        # the stdlib modules src.config needs are imported first, the time
+        # left is app_config and run_init, which is small beside them
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', "import configparser, pathlib\n" + code],
+                              env=env, cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True)
+        modules = import_times(proc)
+        stdlib = modules['configparser'] + modules['pathlib']
+        self.assertLess(modules['src.config'], stdlib / 2, modules)
+
 if __name__ == '__main__':
     # unittest.main()
 
@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  test_inireader.py
+#
+#  Copyright 2026 cswaim <cswaim@jcrl.net>
+#  Licensed under the Apache License, Version 2.0
+#  http://www.apache.org/licenses/LICENSE-2.0
+
+import unittest
+import configparser
+
+from app_config.inireader import read_ini
+
+CFG_TEXT = """[MAIN]
+# this is a comment for var1
+var1 = True
+Var2=2
+var3 : 3.4
+url = http://host:80/path
+novalue
+
+[DATA]
+; sec comment 1
+m1 = textm1
+m2 = m2-1,
+\tm2-2,
+
+\tm2-3
+empty =
+"""
+
+class TestIniReader(unittest.TestCase):
+    """ tests for the inireader module """
+
+    @classmethod
+    def setUpClass(cls):
+        """class set up"""
+        print("\n ------- \nTesting module - test_inireader.py")
+
+    def test_same_as_configparser(self,):
+        """test the values read are the same as ConfigParser """
+        config = configparser.ConfigParser(allow_no_value=True, comment_prefixes=('#', ';'))
+        config.read_string(CFG_TEXT)
+        expected = {s: dict(config.items(s, raw=True)) for s in config.sections()}
+
+        data = read_ini(CFG_TEXT.splitlines(keepends=True))
+        self.assertEqual(data, expected)
+        self.assertEqual(data['DATA']['m2'], 'm2-1,\nm2-2,\n\nm2-3')
+        self.assertIsNone(data['MAIN']['novalue'])
+
+    def test_duplicates(self,):
+        """test duplicate sections and options raise ConfigParser errors """
+        with self.assertRaises(configparser.DuplicateSectionError):
+            read_ini(["[A]", "x = 1", "[A]"])
+        with self.assertRaises(configparser.DuplicateOptionError):
+            read_ini(["[A]", "x = 1", "X = 2"])
+        with self.assertRaises(configparser.MissingSectionHeaderError):
+            read_ini(["x = 1"])
+
+if __name__ == '__main__':
+
+    cf = unittest.TestLoader().loadTestsFromTestCase(TestIniReader)
+    unittest.TextTestRunner(verbosity=2).run(cf)